@@ -0,0 +1,181 @@
+"""Binary array payloads
+
+Large numeric arrays are slow to encode and decode as JSON. Endpoints therefore also accept and return arrays as raw binary data
+with the media type 'application/octet-stream', whose parameters describe the element type and the shape of the array:
+---
+    POST /api/model/predict?top=5
+    Content-Type: application/octet-stream; name=features; dtype=float32; shape=1000,64
+
+    [64000 little-endian 32-bit floats]
+---
+The request body is passed to the parameter named by 'name' as a 'memoryview' of the received bytes, without copying the elements.
+Parameters annotated as 'memoryview' or, if NumPy is installed, 'numpy.ndarray' receive it as such (NumPy arrays share the same buffer);
+other annotations, e.g. List[float], receive the elements converted to Python objects.
+
+Results that are arrays (objects supporting the buffer protocol, such as 'memoryview', 'array.array', and NumPy arrays),
+or lists of numbers, are written to responses as raw binary data if the request accepts 'application/octet-stream',
+with the element type and the shape in the response's media type. Other results are rendered as JSON.
+
+Supported element types are int8, uint8, int16, uint16, int32, uint32, int64, uint64, float32, and float64, in little-endian byte order.
+
+The Dorest project
+:copyright: (c) 2020 Ichise Laboratory at NII & AIST
+:author: Rungsiman Nararatwong
+"""
+
+import array
+import operator
+import struct
+import sys
+from functools import reduce
+from typing import Any, Tuple
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+MEDIA_TYPE = 'application/octet-stream'
+DEFAULT_NAME = 'data'
+
+# Element types and their formats in Python's 'struct' module
+DTYPES = {'int8': 'b', 'uint8': 'B', 'int16': 'h', 'uint16': 'H', 'int32': 'i', 'uint32': 'I',
+          'int64': 'q', 'uint64': 'Q', 'float32': 'f', 'float64': 'd'}
+FORMATS = {**{code: dtype for dtype, code in DTYPES.items()}, 'l': 'int64', 'L': 'uint64'}
+
+
+def is_array(obj: Any) -> bool:
+    """Check whether a result can be written as a binary array"""
+
+    if isinstance(obj, (memoryview, array.array)) or (numpy is not None and isinstance(obj, numpy.ndarray)):
+        return True
+
+    return isinstance(obj, list) and len(obj) > 0 and all(type(item) in (int, float) for item in obj)
+
+
+def to_memoryview(obj: Any) -> memoryview:
+    """Expose an array's elements as a 'memoryview', copying them only if they are Python objects or not contiguous
+
+    :param obj: An array, or a list of numbers
+    :return: A C-contiguous memoryview
+    """
+
+    if isinstance(obj, list):
+        return memoryview(array.array('d' if any(type(item) is float for item in obj) else 'q', obj))
+
+    if numpy is not None and isinstance(obj, numpy.ndarray):
+        obj = numpy.ascontiguousarray(obj)
+
+    view = memoryview(obj)
+    return view if view.c_contiguous else memoryview(view.tobytes()).cast(view.format, view.shape)
+
+
+def describe(view: memoryview) -> Tuple[str, str]:
+    """Describe an array's element type and shape as written in the media type
+
+    :param view: The array
+    :return: A tuple of (element type, comma-separated shape)
+    """
+
+    dtype = FORMATS.get(view.format.lstrip('<=@'), None)
+
+    if dtype is None:
+        raise TypeError("Arrays of format '%s' cannot be written as binary data" % view.format)
+
+    return dtype, ','.join(str(dimension) for dimension in view.shape)
+
+
+def from_bytes(data: Any, dtype: str, shape: Tuple[int, ...] = None) -> memoryview:
+    """Interpret raw binary data as an array, without copying it
+
+    :param data: An object supporting the buffer protocol, e.g. bytes
+    :param dtype: The element type
+    :param shape: The shape of the array; if None, the array is one-dimensional
+    :return: A memoryview of the array
+    :raise ValueError: If the element type is not supported, or the data does not hold exactly the elements of the shape
+    """
+
+    if dtype not in DTYPES:
+        raise ValueError("Unsupported element type '%s' (expected one of %s)" % (dtype, ', '.join(DTYPES)))
+
+    view = memoryview(data).cast('B')
+    size = struct.calcsize(DTYPES[dtype])
+
+    if len(view) % size != 0:
+        raise ValueError('The data is not a whole number of %s elements' % dtype)
+
+    if shape is not None and (any(dimension < 0 for dimension in shape) or reduce(operator.mul, shape, 1) != len(view) // size):
+        raise ValueError('Shape %s does not match the %d elements received' % (','.join(str(dimension) for dimension in shape), len(view) // size))
+
+    if sys.byteorder != 'little' and DTYPES[dtype] not in 'bB':
+        view = memoryview(_swap(view, DTYPES[dtype]))
+
+    return view.cast(DTYPES[dtype], shape) if shape is not None and len(shape) != 1 else view.cast(DTYPES[dtype])
+
+
+def _swap(view: memoryview, code: str) -> bytes:
+    elements = array.array(code, view.tobytes())
+    elements.byteswap()
+    return elements.tobytes()
+
+
+class ArrayParser(BaseParser):
+    """Parse a binary array sent as the request body into the parameter named in the media type"""
+
+    media_type = MEDIA_TYPE
+
+    def parse(self, stream: Any, media_type: str = None, parser_context: dict = None) -> dict:
+        params = _media_params(media_type or '')
+
+        try:
+            shape = tuple(int(dimension) for dimension in params['shape'].split(',')) if 'shape' in params else None
+            data = stream.read() if stream is not None else b''
+            return {params.get('name', DEFAULT_NAME): from_bytes(data, params.get('dtype', 'uint8'), shape)}
+        except (TypeError, ValueError) as error:
+            raise ParseError('Binary array parse error - %s' % error)
+
+
+class ArrayRenderer(BaseRenderer):
+    """Write an array result as raw binary data, describing its element type and shape in the media type"""
+
+    media_type = MEDIA_TYPE
+    format = 'bin'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data: Any, accepted_media_type: str = None, renderer_context: dict = None) -> bytes:
+        response = (renderer_context or {}).get('response', None)
+        result = data.get('data', None) if isinstance(data, dict) else None
+
+        try:
+            view = to_memoryview(result) if is_array(result) else None
+            dtype, shape = describe(view) if view is not None else (None, None)
+        except (OverflowError, TypeError, ValueError):
+            # E.g. lists of integers beyond the range of int64
+            view = None
+
+        if view is None:
+            # Errors and results that are not arrays of supported element types are rendered as JSON
+            if response is not None:
+                response['Content-Type'] = 'application/json'
+
+            return JSONRenderer().render(data, 'application/json', renderer_context)
+
+        # Django REST Framework sets the response's media type before rendering
+        if response is not None:
+            response['Content-Type'] = '%s; dtype=%s; shape=%s' % (MEDIA_TYPE, dtype, shape)
+
+        if sys.byteorder != 'little' and view.format not in 'bB':
+            return _swap(view.cast('B'), view.format)
+
+        # Django's response copies the bytes once; the elements themselves are never converted
+        return view.cast('B')
+
+
+def _media_params(media_type: str) -> dict:
+    return {key.strip().lower(): value.strip() for key, _, value in
+            (param.partition('=') for param in media_type.split(';')[1:]) if key.strip()}
@@ -0,0 +1,370 @@
+"""Endpoint result caches
+
+An endpoint may cache its results by declaring caching options in the 'endpoint' decorator, e.g.:
+---
+    @endpoint(['GET'], cache_ttl=60, cache_size=1024, cache_vary_on=['isbn'])
+    def find_book(isbn: str, verbose: bool = False) -> dict:
+        ...
+---
+Results are keyed by the endpoint and the arguments parsed from the request ('Endpoint.parse'),
+optionally restricted to some of the arguments ('cache_vary_on') and extended with the requesting user ('cache_vary_on_user',
+implied if the endpoint receives the request).
+They are kept in an in-process LRU store, or in one of Django's cache backends if 'cache_backend' names its alias.
+
+With 'cache_stale', a result that has outlived its 'cache_ttl' is still served for that many more seconds,
+while a single background worker recomputes it, so that callers never wait for an expensive endpoint to recompute an expired result:
+---
+    @endpoint(['GET'], cache_ttl=60, cache_stale=600)
+    def monthly_report(year: int, month: int) -> dict:
+        ...
+---
+Only one refresh per result runs at a time, within the process or, with 'cache_backend', across all workers sharing the backend.
+
+Results may be tagged, so that endpoints modifying the underlying data invalidate them as soon as they succeed, e.g.:
+---
+    @endpoint(['GET'], cache_ttl=3600, cache_tags=['articles'])
+    def list_articles(page: int = 1) -> list:
+        ...
+
+    @endpoint(['POST'], invalidates=['articles'])
+    def publish_article(title: str, body: str) -> dict:
+        ...
+---
+Invalidating a tag clears the tagged results kept in process memory, and increments the tag's generation,
+which is part of the key of every tagged result (see 'invalidate').
+Generations are kept in the endpoint's cache backend, or in the backend named by 'DOREST["CACHE"]["TAGS_BACKEND"]' in Django's settings,
+in which case results kept in the memory of other workers are invalidated as well.
+
+Cached results are shared between requests and must therefore not be modified by the caller.
+Iterators, which are streamed (see 'responses.stream'), are never cached.
+
+The Dorest project
+:copyright: (c) 2020 Ichise Laboratory at NII & AIST
+:author: Rungsiman Nararatwong
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Tuple
+
+from django.conf import settings
+from django.core.cache import caches as django_caches
+from django.db import close_old_connections
+
+from rest_framework.request import Request
+
+from dorest import responses, verbose
+
+DEFAULT_SIZE = 1024
+KEY_PREFIX = 'dorest'
+REFRESH_WORKERS = 4
+
+_refresher = None
+_refresher_lock = threading.Lock()
+
+_tagged = dict()                # A dictionary of {[tag]: [set of EndpointCache]}
+_tagged_lock = threading.Lock()
+
+
+def make_key(trace: str, parameters: Dict[str, Any], request: Request = None, *, vary_on: Iterable[str] = None, vary_on_user: bool = False,
+             exclude: Iterable[str] = ()) -> str:
+    """Generate a key identifying an endpoint call from the endpoint's trace and the normalized arguments
+
+    :param trace: The endpoint function's module and qualified name
+    :param parameters: Arguments parsed from the request
+    :param request: The request, if any
+    :param vary_on: Names of the parameters that make up the key; if None, all parameters are used
+    :param vary_on_user: Include the requesting user in the key
+    :param exclude: Names of the parameters never used in the key
+    :return: The key
+    """
+
+    arguments = {name: value for name, value in parameters.items() if name not in exclude and (vary_on is None or name in vary_on)}
+
+    if vary_on_user:
+        arguments[':user'] = getattr(getattr(request, 'user', None), 'pk', None)
+
+    digest = hashlib.sha1(json.dumps(arguments, sort_keys=True, default=_identify, separators=(',', ':')).encode('utf-8')).hexdigest()
+    return '%s:%s:%s' % (KEY_PREFIX, trace, digest)
+
+
+def _identify(obj: Any) -> str:
+    """Identify an argument that JSON cannot encode, hashing the contents of arrays (see 'arrays'), whose representations are truncated"""
+
+    try:
+        view = memoryview(obj)
+    except TypeError:
+        return repr(obj)
+
+    return '%s:%s:%s' % (view.format, view.shape, hashlib.sha1(view if view.c_contiguous else view.tobytes()).hexdigest())
+
+
+class LocalStore:
+    """In-process store that evicts the least recently used entries beyond its size"""
+
+    def __init__(self, size: int = DEFAULT_SIZE):
+        self.size = size
+        self._entries = OrderedDict()       # A dictionary of {[key]: ([expiry time], [value])}
+        self._claims = set()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Retrieve a value
+
+        :param key: The key
+        :return: A tuple of (whether the key was found and has not expired, the value)
+        """
+
+        with self._lock:
+            entry = self._entries.get(key, None)
+
+            if entry is None:
+                return False, None
+
+            if entry[0] is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                return False, None
+
+            self._entries.move_to_end(key)
+            return True, entry[1]
+
+    def set(self, key: str, value: Any, ttl: float = None) -> None:
+        """Store a value
+
+        :param key: The key
+        :param value: The value
+        :param ttl: Time to live in seconds; if None, the value does not expire
+        :return: None
+        """
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl if ttl is not None else None, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def claim(self, key: str, timeout: float) -> bool:
+        """Claim a key for exclusive work, e.g., refreshing the value
+
+        :param key: The key
+        :param timeout: Not used by the in-process store, where claims are released explicitly
+        :return: True if the key was not already claimed
+        """
+
+        with self._lock:
+            if key in self._claims:
+                return False
+
+            self._claims.add(key)
+            return True
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            self._claims.discard(key)
+
+
+class BackendStore:
+    """Store backed by one of Django's cache backends, which may be shared between workers"""
+
+    def __init__(self, alias: str = 'default'):
+        self.alias = alias
+
+    @property
+    def cache(self) -> Any:
+        # Django's cache handler keeps one connection per thread
+        return django_caches[self.alias]
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        # Values are wrapped in tuples to tell cached None results from missing keys
+        entry = self.cache.get(key, None)
+        return (True, entry[0]) if entry is not None else (False, None)
+
+    def set(self, key: str, value: Any, ttl: float = None) -> None:
+        self.cache.set(key, (value,), timeout=ttl)
+
+    def delete(self, key: str) -> None:
+        self.cache.delete(key)
+
+    def claim(self, key: str, timeout: float) -> bool:
+        # 'add' only stores the key if it does not exist, which makes the claim exclusive across workers
+        return self.cache.add('%s:claim' % key, True, timeout=timeout)
+
+    def release(self, key: str) -> None:
+        self.cache.delete('%s:claim' % key)
+
+
+class EndpointCache:
+    """Cache of an endpoint function's results"""
+
+    def __init__(self, func: Callable[..., Any], *, ttl: float = None, size: int = None, vary_on: Iterable[str] = None,
+                 vary_on_user: bool = False, backend: str = None, exclude: Iterable[str] = (), stale: float = None,
+                 tags: Iterable[str] = ()):
+        """
+        :param func: The endpoint function
+        :param ttl: Time to live of cached results in seconds; if None, results do not expire
+        :param size: The maximum number of results kept in the in-process store
+        :param vary_on: Names of the parameters that make up the cache key; if None, all parameters are used
+        :param vary_on_user: Cache results separately for each user
+        :param backend: Alias of Django's cache backend; if None, results are kept in an in-process store
+        :param exclude: Names of the parameters never used in the cache key (e.g. the parameter receiving the request)
+        :param stale: Seconds during which an expired result is still served while it is recomputed in the background
+        :param tags: Tags whose invalidation discards the cached results (see 'invalidate')
+        """
+
+        self.trace = '%s.%s' % (func.__module__, func.__qualname__)
+        self.ttl = ttl
+        self.stale = stale if ttl is not None else None
+        self.vary_on = tuple(vary_on) if vary_on is not None else None
+        self.vary_on_user = vary_on_user
+        self.exclude = tuple(exclude)
+        self.store = BackendStore(backend) if backend is not None else LocalStore(size if size is not None else DEFAULT_SIZE)
+        self.tags = tuple(sorted(set(tags)))
+        self.tags_backend = backend if backend is not None else _get_tags_backend()
+
+        with _tagged_lock:
+            for tag in self.tags:
+                _tagged.setdefault(tag, set()).add(self)
+
+    def key(self, parameters: Dict[str, Any], request: Request = None) -> str:
+        """Generate the cache key of an endpoint call, which includes the current generations of the cache's tags
+
+        :param parameters: Arguments parsed from the request
+        :param request: The request, if any
+        :return: The cache key
+        """
+
+        key = make_key(self.trace, parameters, request, vary_on=self.vary_on, vary_on_user=self.vary_on_user, exclude=self.exclude)
+
+        if len(self.tags) == 0 or self.tags_backend is None:
+            return key
+
+        generations = django_caches[self.tags_backend].get_many([_tag_key(tag) for tag in self.tags])
+        return '%s:%s' % (key, '.'.join(str(generations.get(_tag_key(tag), 0)) for tag in self.tags))
+
+    def __call__(self, call: Callable[[Dict[str, Any], Request], Any]) -> Callable[[Dict[str, Any], Request], Any]:
+        """Wrap the function that executes an endpoint call (see 'decorators.endpoint') with the cache
+
+        :param call: A function receiving the parsed arguments and the request
+        :return: The wrapped function
+        """
+
+        def cached_call(parameters: Dict[str, Any], request: Request = None) -> Any:
+            key = self.key(parameters, request)
+            found, entry = self.store.get(key)
+
+            if not found:
+                return self._recompute(key, call, parameters, request)
+
+            # Each entry holds the time until which its result is fresh, and the result
+            fresh_until, result = entry
+
+            if fresh_until is not None and fresh_until <= time.time() and self.store.claim(key, self.stale):
+                _get_refresher().submit(self._refresh, key, call, parameters, request)
+
+            return result
+
+        cached_call.cache = self
+        return cached_call
+
+    def _recompute(self, key: str, call: Callable[[Dict[str, Any], Request], Any], parameters: Dict[str, Any], request: Request) -> Any:
+        result = call(parameters, request)
+
+        if not responses.is_stream(result):
+            if self.stale is None:
+                self.store.set(key, (None, result), self.ttl)
+            else:
+                self.store.set(key, (time.time() + self.ttl, result), self.ttl + self.stale)
+
+        return result
+
+    def _refresh(self, key: str, call: Callable[[Dict[str, Any], Request], Any], parameters: Dict[str, Any], request: Request) -> None:
+        """Recompute a stale result in the background, leaving the stale result in place if the computation fails"""
+
+        close_old_connections()
+
+        try:
+            self._recompute(key, call, parameters, request)
+        except Exception as error:
+            verbose.error("Could not refresh cached result of '%s': %s" % (self.trace, error))
+        finally:
+            self.store.release(key)
+            close_old_connections()
+
+
+def invalidate(*tags: str) -> None:
+    """Discard cached results tagged with any of the given tags
+
+    Tagged results kept in process memory are cleared, and the tags' generations are incremented in every cache backend
+    holding them, so that workers sharing those backends stop using results cached before the invalidation.
+
+    :param tags: Tags declared by endpoints with 'cache_tags'
+    :return: None
+    """
+
+    with _tagged_lock:
+        tagged = {cache for tag in tags for cache in _tagged.get(tag, ())}
+
+    for cache in tagged:
+        if isinstance(cache.store, LocalStore):
+            cache.store.clear()
+
+    backends = {cache.tags_backend for cache in tagged} | {_get_tags_backend()}
+
+    for alias in backends - {None}:
+        for tag in tags:
+            # 'add' creates a missing generation, which 'incr' would otherwise refuse to increment
+            if not django_caches[alias].add(_tag_key(tag), 1, timeout=None):
+                try:
+                    django_caches[alias].incr(_tag_key(tag))
+                except ValueError:
+                    django_caches[alias].set(_tag_key(tag), 1, timeout=None)
+
+
+def invalidating(tags: Iterable[str], call: Callable[[Dict[str, Any], Request], Any]) -> Callable[[Dict[str, Any], Request], Any]:
+    """Wrap the function that executes an endpoint call (see 'decorators.endpoint') to invalidate tags once the call succeeds
+
+    :param tags: Tags to invalidate
+    :param call: A function receiving the parsed arguments and the request
+    :return: The wrapped function
+    """
+
+    tags = tuple(tags)
+
+    def invalidating_call(parameters: Dict[str, Any], request: Request = None) -> Any:
+        result = call(parameters, request)
+        invalidate(*tags)
+        return result
+
+    return invalidating_call
+
+
+def _tag_key(tag: str) -> str:
+    return '%s:tag:%s' % (KEY_PREFIX, tag)
+
+
+def _get_tags_backend() -> str:
+    return settings.DOREST.get('CACHE', {}).get('TAGS_BACKEND', None) if hasattr(settings, 'DOREST') else None
+
+
+def _get_refresher() -> ThreadPoolExecutor:
+    global _refresher
+
+    if _refresher is None:
+        with _refresher_lock:
+            if _refresher is None:
+                _refresher = ThreadPoolExecutor(max_workers=REFRESH_WORKERS, thread_name_prefix='dorest-refresh')
+
+    return _refresher
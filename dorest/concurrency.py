@@ -0,0 +1,263 @@
+"""Concurrency controls for endpoint calls
+
+Single-flight coalescing lets concurrent calls with identical arguments share one execution of an endpoint function:
+the first caller executes the function while the others wait for its result, e.g.:
+---
+    @endpoint(['GET'], coalesce=True)
+    def dashboard(team: str) -> dict:
+        ...
+---
+Calls are identified by the endpoint's trace and the normalized arguments parsed from the request (see 'caches.make_key').
+If the endpoint receives the request ('include_request'), calls are coalesced only within the same user.
+Coalescing applies to the threads of one worker process; it is usually combined with caching so that the coalesced result is also kept.
+
+Admission control limits the number of concurrent calls to an endpoint, so that a slow endpoint cannot occupy every worker thread:
+---
+    @endpoint(['GET'], max_concurrency=4, queue_timeout=2)
+    def render_report(year: int) -> dict:
+        ...
+---
+Requests beyond the limit wait for at most 'queue_timeout' seconds, in a queue holding at most 'max_concurrency' requests,
+then receive a 503 response with a Retry-After header; they are turned away before their arguments are parsed.
+Limits apply to the threads of one worker process.
+
+Micro-batching groups calls arriving within a short window and passes them to the function at once,
+which suits functions that process many inputs much faster together than one by one (e.g. vectorized models):
+---
+    @endpoint(['GET'], batchable=True, batch_window=0.005, batch_size=64)
+    def score(features: List[float]) -> List[float]:
+        return model.predict(numpy.array(features)).tolist()
+---
+Annotations describe the arguments of a single call, as parsed from a request, while the function receives a list of them per parameter
+and returns a list of results, one per call in the same order. Only calls passing the same set of arguments are grouped together.
+Concurrent requests, and calls in a batch request executed by several threads (see 'struct.bind_batch'), are grouped within a worker process;
+a call waits at most 'batch_window' seconds for others to join it.
+
+The Dorest project
+:copyright: (c) 2020 Ichise Laboratory at NII & AIST
+:author: Rungsiman Nararatwong
+"""
+
+import threading
+from typing import Any, Callable, Dict, Iterable, List
+
+from asgiref.sync import sync_to_async
+
+from rest_framework.request import Request
+
+from dorest import caches, responses
+from dorest.exceptions import EndpointOverloaded
+
+RETRY_AFTER = 1
+DEFAULT_BATCH_WINDOW = 0.005
+DEFAULT_BATCH_SIZE = 64
+
+
+class _Flight:
+    """An execution of an endpoint call shared by concurrent callers"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.shared = True
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with identical arguments to an endpoint function"""
+
+    def __init__(self, func: Callable[..., Any], *, vary_on_user: bool = False, exclude: Iterable[str] = ()):
+        """
+        :param func: The endpoint function
+        :param vary_on_user: Coalesce calls only within the same user
+        :param exclude: Names of the parameters never used to identify a call (e.g. the parameter receiving the request)
+        """
+
+        self.trace = '%s.%s' % (func.__module__, func.__qualname__)
+        self.vary_on_user = vary_on_user
+        self.exclude = tuple(exclude)
+        self._flights = dict()      # A dictionary of {[key]: [_Flight]}
+        self._lock = threading.Lock()
+
+    def __call__(self, call: Callable[[Dict[str, Any], Request], Any]) -> Callable[[Dict[str, Any], Request], Any]:
+        """Wrap the function that executes an endpoint call (see 'decorators.endpoint') with coalescing
+
+        :param call: A function receiving the parsed arguments and the request
+        :return: The wrapped function
+        """
+
+        def coalesced_call(parameters: Dict[str, Any], request: Request = None) -> Any:
+            key = caches.make_key(self.trace, parameters, request, vary_on_user=self.vary_on_user, exclude=self.exclude)
+
+            with self._lock:
+                flight = self._flights.get(key, None)
+                leading = flight is None
+
+                if leading:
+                    flight = self._flights[key] = _Flight()
+
+            if not leading:
+                flight.done.wait()
+
+                if flight.error is not None:
+                    raise flight.error
+
+                # Iterators can only be consumed once, so each caller executes the function on its own
+                return flight.result if flight.shared else call(parameters, request)
+
+            try:
+                flight.result = call(parameters, request)
+                flight.shared = not responses.is_stream(flight.result)
+                return flight.result
+            except Exception as error:
+                flight.error = error
+                raise
+            finally:
+                with self._lock:
+                    del self._flights[key]
+
+                flight.done.set()
+
+        coalesced_call.flight = self
+        return coalesced_call
+
+
+class Admission:
+    """Limit the number of concurrent calls to an endpoint function, turning away requests that cannot be admitted in time"""
+
+    def __init__(self, func: Callable[..., Any], *, max_concurrency: int, queue_timeout: float = None):
+        """
+        :param func: The endpoint function
+        :param max_concurrency: The maximum number of concurrent calls
+        :param queue_timeout: Seconds a request may wait for a call to complete; if None, requests beyond the limit are turned away at once
+        """
+
+        self.trace = '%s.%s' % (func.__module__, func.__qualname__)
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._waiting = 0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Wait for a call slot
+
+        :return: None
+        :raise EndpointOverloaded: If the queue is full or no slot became available in time
+        """
+
+        if self._slots.acquire(blocking=False):
+            return
+
+        with self._lock:
+            if self.queue_timeout is None or self._waiting >= self.max_concurrency:
+                raise EndpointOverloaded(wait=RETRY_AFTER)
+
+            self._waiting += 1
+
+        try:
+            acquired = self._slots.acquire(timeout=self.queue_timeout)
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+        if not acquired:
+            raise EndpointOverloaded(wait=RETRY_AFTER)
+
+    async def aacquire(self) -> None:
+        """Wait for a call slot without blocking the event loop (see 'acquire')"""
+
+        if self._slots.acquire(blocking=False):
+            return
+
+        await sync_to_async(self.acquire, thread_sensitive=False)()
+
+    def release(self) -> None:
+        self._slots.release()
+
+
+class _Batch:
+    """Calls grouped to be passed to an endpoint function at once"""
+
+    def __init__(self):
+        self.calls = list()     # A list of parsed arguments
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.results = None
+        self.error = None
+
+
+class MicroBatcher:
+    """Group concurrent calls to an endpoint function that processes lists of inputs"""
+
+    def __init__(self, func: Callable[..., Any], *, window: float = None, size: int = None):
+        """
+        :param func: The endpoint function
+        :param window: Seconds a call waits for other calls to join its group
+        :param size: The maximum number of calls in a group
+        """
+
+        self.trace = '%s.%s' % (func.__module__, func.__qualname__)
+        self.window = window if window is not None else DEFAULT_BATCH_WINDOW
+        self.size = size if size is not None else DEFAULT_BATCH_SIZE
+        self._open = dict()     # A dictionary of {[tuple of parameter names]: [_Batch]}
+        self._lock = threading.Lock()
+
+    def __call__(self, call: Callable[[Dict[str, Any], Request], Any]) -> Callable[[Dict[str, Any], Request], Any]:
+        """Wrap the function that executes an endpoint call (see 'decorators.endpoint') with micro-batching
+
+        :param call: A function receiving the parsed arguments and the request
+        :return: The wrapped function, which receives the arguments of a single call and returns its result
+        """
+
+        def batched_call(parameters: Dict[str, Any], request: Request = None) -> Any:
+            names = tuple(sorted(parameters))
+
+            with self._lock:
+                batch = self._open.get(names, None)
+                leading = batch is None
+
+                if leading:
+                    batch = self._open[names] = _Batch()
+
+                index = len(batch.calls)
+                batch.calls.append(parameters)
+
+                if len(batch.calls) >= self.size:
+                    del self._open[names]
+                    batch.full.set()
+
+            if not leading:
+                batch.done.wait()
+
+                if batch.error is not None:
+                    raise batch.error
+
+                return batch.results[index]
+
+            batch.full.wait(self.window)
+
+            with self._lock:
+                if self._open.get(names, None) is batch:
+                    del self._open[names]
+
+            try:
+                batch.results = self._split(call({name: [parameters[name] for parameters in batch.calls] for name in names}, request),
+                                            len(batch.calls))
+                return batch.results[0]
+            except Exception as error:
+                batch.error = error
+                raise
+            finally:
+                batch.done.set()
+
+        batched_call.batcher = self
+        return batched_call
+
+    def _split(self, results: Any, count: int) -> List[Any]:
+        results = list(results) if results is not None else []
+
+        if len(results) != count:
+            raise ValueError("Endpoint '%s' returned %d results for %d calls" % (self.trace, len(results), count))
+
+        return results
@@ -0,0 +1,377 @@
+"""Typing-aware converters for endpoint function parameters
+
+Inputs of an API request arrive either as strings (query parameters and form data) or as values decoded from a JSON body.
+The 'converter' function builds, once per annotation, a function that converts such an input to the annotated type,
+validating nested structures in a single pass:
+---
+    convert = converters.converter(Dict[str, List[int]])
+    convert('{"a": [1, "2"]}')      # {'a': [1, 2]}
+    convert('{"a": ["x"]}')         # ValueError
+---
+
+Supported annotations are bool, int, float, str, bytes, Decimal, UUID, datetime, date, time, Enum, Literal, Any,
+Optional and Union, generic containers (e.g. List[int], Tuple[int, ...], Set[str], Dict[str, float]), dataclasses, and NamedTuple.
+Structured inputs given as strings are decoded as JSON. Parameters without annotations are guessed (see 'guess').
+Binary arrays (see 'arrays') are passed as they are to parameters annotated as 'memoryview' or 'numpy.ndarray',
+and converted to lists for other containers.
+
+The Dorest project
+:copyright: (c) 2020 Ichise Laboratory at NII & AIST
+:author: Rungsiman Nararatwong
+"""
+
+import collections.abc
+import dataclasses
+import datetime
+import enum
+import inspect
+import json
+import types
+import typing
+import uuid
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from typing import Any, Callable
+
+from dorest import arrays
+
+_NONE_STRINGS = ('', 'null', 'none')
+
+
+def guess(obj: Any) -> Any:
+    """In case the parameter annotation is not provided, guess and try to parse the input"""
+
+    if not isinstance(obj, str):
+        return obj
+
+    if obj.lower() in ['true', 'false']:
+        return obj.lower() == 'true'
+
+    for type_candidate in [float, int]:
+        try:
+            return type_candidate(obj)
+        except ValueError:
+            continue
+
+    try:
+        return json.loads(obj)
+    except json.decoder.JSONDecodeError:
+        return str(obj)
+
+
+def converter(annotation: Any) -> Callable[[Any], Any]:
+    """Retrieve the converter of an annotation, building it on first use
+
+    :param annotation: A type annotation, as returned by 'typing.get_type_hints'
+    :return: A function that converts an input to the annotated type, raising ValueError or TypeError on invalid inputs
+    """
+
+    try:
+        return _cached_converter(annotation)
+    except TypeError:
+        # Unhashable annotations cannot be cached
+        return _build(annotation)
+
+
+@lru_cache(maxsize=None)
+def _cached_converter(annotation: Any) -> Callable[[Any], Any]:
+    return _build(annotation)
+
+
+def _build(annotation: Any) -> Callable[[Any], Any]:
+    origin, args = getattr(annotation, '__origin__', None), getattr(annotation, '__args__', None) or ()
+
+    if annotation is None or annotation is inspect.Parameter.empty or annotation is Any:
+        return guess
+
+    if annotation is type(None):
+        return _convert_none
+
+    if origin is typing.Union or (getattr(types, 'UnionType', None) is not None and isinstance(annotation, types.UnionType)):
+        return _union(annotation.__args__)
+
+    if origin is getattr(typing, 'Literal', None):
+        return _literal(args)
+
+    if inspect.isclass(origin) and issubclass(origin, collections.abc.Set):
+        return _collection(frozenset if issubclass(origin, frozenset) else set, args[0] if len(args) else Any)
+
+    if inspect.isclass(origin) and issubclass(origin, collections.abc.Sequence) and not issubclass(origin, (str, bytes, tuple)):
+        return _collection(list, args[0] if len(args) else Any)
+
+    if origin is tuple:
+        return _tuple(args)
+
+    if inspect.isclass(origin) and issubclass(origin, collections.abc.Mapping):
+        return _mapping(*(args if len(args) == 2 else (Any, Any)))
+
+    if origin is not None:
+        return converter(origin)
+
+    if not inspect.isclass(annotation):
+        return guess
+
+    if issubclass(annotation, bool):
+        return _convert_bool
+
+    if issubclass(annotation, enum.Enum):
+        return _enum(annotation)
+
+    if issubclass(annotation, int):
+        return _convert_int if annotation is int else lambda obj: annotation(_convert_int(obj))
+
+    if issubclass(annotation, float):
+        return _convert_float if annotation is float else lambda obj: annotation(_convert_float(obj))
+
+    if issubclass(annotation, str):
+        return _convert_str if annotation is str else lambda obj: annotation(_convert_str(obj))
+
+    if issubclass(annotation, memoryview):
+        return _convert_memoryview
+
+    if arrays.numpy is not None and issubclass(annotation, arrays.numpy.ndarray):
+        return lambda obj: obj if isinstance(obj, arrays.numpy.ndarray) else arrays.numpy.asarray(obj if isinstance(obj, memoryview) else _decode(obj, list))
+
+    if issubclass(annotation, bytes):
+        return lambda obj: obj if isinstance(obj, bytes) else str(obj).encode('utf-8')
+
+    if issubclass(annotation, Decimal):
+        return _convert_decimal
+
+    if issubclass(annotation, uuid.UUID):
+        return lambda obj: obj if isinstance(obj, uuid.UUID) else uuid.UUID(str(obj))
+
+    if issubclass(annotation, datetime.datetime):
+        return _convert_datetime
+
+    if issubclass(annotation, datetime.date):
+        return lambda obj: obj if isinstance(obj, datetime.date) else datetime.date.fromisoformat(str(obj))
+
+    if issubclass(annotation, datetime.time):
+        return lambda obj: obj if isinstance(obj, datetime.time) else datetime.time.fromisoformat(str(obj))
+
+    if dataclasses.is_dataclass(annotation):
+        return _structure(annotation, lambda: {field.name: field.type for field in dataclasses.fields(annotation) if field.init})
+
+    if issubclass(annotation, tuple) and hasattr(annotation, '_fields'):
+        return _structure(annotation, lambda: {field: getattr(annotation, '__annotations__', {}).get(field, Any) for field in annotation._fields})
+
+    if issubclass(annotation, (list, set, frozenset)):
+        return _collection(annotation, Any)
+
+    if issubclass(annotation, tuple):
+        return lambda obj: tuple(_decode(obj, list))
+
+    if issubclass(annotation, dict):
+        return lambda obj: _decode(obj, dict)
+
+    def reject(obj: Any) -> Any:
+        raise TypeError("Expected '%s' but '%s' was given" % (annotation.__name__, type(obj).__name__))
+
+    return reject
+
+
+def _decode(obj: Any, expected: type) -> Any:
+    """Decode a JSON string into a structured value of the expected type"""
+
+    if isinstance(obj, (str, bytes)):
+        obj = json.loads(obj)
+    elif isinstance(obj, memoryview):
+        obj = obj.tolist()
+
+    if not isinstance(obj, expected):
+        raise TypeError("Expected a JSON %s but '%s' was given" % ('object' if expected is dict else 'array', type(obj).__name__))
+
+    return obj
+
+
+def _convert_memoryview(obj: Any) -> memoryview:
+    if isinstance(obj, memoryview):
+        return obj
+
+    try:
+        return arrays.to_memoryview(obj)
+    except TypeError:
+        return arrays.to_memoryview(_decode(obj, list))
+
+
+def _convert_none(obj: Any) -> None:
+    if obj is None or (isinstance(obj, str) and obj.lower() in _NONE_STRINGS):
+        return None
+
+    raise ValueError("Expected null but '%s' was given" % obj)
+
+
+def _convert_bool(obj: Any) -> bool:
+    if isinstance(obj, bool):
+        return obj
+
+    if str(obj).lower() in ('true', '1'):
+        return True
+    elif str(obj).lower() in ('false', '0'):
+        return False
+
+    raise ValueError("Expected a boolean but '%s' was given" % obj)
+
+
+def _convert_int(obj: Any) -> int:
+    if isinstance(obj, bool):
+        raise TypeError("Expected an integer but a boolean was given")
+
+    if isinstance(obj, float) and not obj.is_integer():
+        raise ValueError("Expected an integer but '%s' was given" % obj)
+
+    return int(obj)
+
+
+def _convert_float(obj: Any) -> float:
+    if isinstance(obj, bool):
+        raise TypeError("Expected a number but a boolean was given")
+
+    return float(obj)
+
+
+def _convert_str(obj: Any) -> str:
+    if isinstance(obj, (dict, list)):
+        raise TypeError("Expected a string but '%s' was given" % type(obj).__name__)
+
+    return obj if isinstance(obj, str) else str(obj)
+
+
+def _convert_decimal(obj: Any) -> Decimal:
+    try:
+        return obj if isinstance(obj, Decimal) else Decimal(str(obj))
+    except InvalidOperation:
+        raise ValueError("Expected a decimal number but '%s' was given" % obj)
+
+
+def _convert_datetime(obj: Any) -> datetime.datetime:
+    if isinstance(obj, datetime.datetime):
+        return obj
+
+    value = str(obj)
+    return datetime.datetime.fromisoformat(value[:-1] + '+00:00' if value.endswith('Z') else value)
+
+
+def _union(members: tuple) -> Callable[[Any], Any]:
+    optional = type(None) in members
+    candidates = [converter(member) for member in members if member is not type(None)]
+
+    def convert(obj: Any) -> Any:
+        if optional and (obj is None or (isinstance(obj, str) and obj.lower() in _NONE_STRINGS)):
+            return None
+
+        errors = []
+
+        for candidate in candidates:
+            try:
+                return candidate(obj)
+            except (TypeError, ValueError) as error:
+                errors.append(str(error))
+
+        raise ValueError('; '.join(errors))
+
+    return candidates[0] if len(candidates) == 1 and not optional else convert
+
+
+def _literal(values: tuple) -> Callable[[Any], Any]:
+    lookup = {str(value): value for value in values}
+
+    def convert(obj: Any) -> Any:
+        if any(obj == value and type(obj) is type(value) for value in values):
+            return obj
+
+        try:
+            return lookup[str(obj)]
+        except KeyError:
+            raise ValueError("Expected one of %s but '%s' was given" % (', '.join(lookup), obj))
+
+    return convert
+
+
+def _enum(annotation: type) -> Callable[[Any], Any]:
+    lookup = {**{str(member.value): member for member in annotation}, **{member.name: member for member in annotation}}
+
+    def convert(obj: Any) -> Any:
+        if isinstance(obj, annotation):
+            return obj
+
+        try:
+            return lookup[str(obj)]
+        except KeyError:
+            raise ValueError("Expected one of %s but '%s' was given" % (', '.join(lookup), obj))
+
+    return convert
+
+
+def _collection(container: type, item: Any) -> Callable[[Any], Any]:
+    convert_item = converter(item)
+
+    if convert_item is guess:
+        return lambda obj: container(_decode(obj, list))
+    else:
+        return lambda obj: container(convert_item(value) for value in _decode(obj, list))
+
+
+def _tuple(items: tuple) -> Callable[[Any], Any]:
+    if len(items) == 0 or (len(items) == 2 and items[1] is Ellipsis):
+        convert_item = converter(items[0] if len(items) else Any)
+        return lambda obj: tuple(convert_item(value) for value in _decode(obj, list))
+
+    convert_items = [converter(item) for item in items]
+
+    def convert(obj: Any) -> tuple:
+        values = _decode(obj, list)
+
+        if len(values) != len(convert_items):
+            raise ValueError('Expected %d items but %d were given' % (len(convert_items), len(values)))
+
+        return tuple(convert_item(value) for convert_item, value in zip(convert_items, values))
+
+    return convert
+
+
+def _mapping(key: Any, value: Any) -> Callable[[Any], Any]:
+    convert_key, convert_value = converter(key), converter(value)
+    return lambda obj: {convert_key(k): convert_value(v) for k, v in _decode(obj, dict).items()}
+
+
+def _structure(annotation: type, describe_fields: Callable[[], dict]) -> Callable[[Any], Any]:
+    """Build a converter of dataclasses and named tuples, which accept JSON objects (and JSON arrays for named tuples)
+
+    Field converters are resolved on first use, so that structures may refer to themselves.
+    """
+
+    fields = dict()
+
+    def convert(obj: Any) -> Any:
+        if isinstance(obj, annotation):
+            return obj
+
+        if len(fields) == 0:
+            try:
+                hints = typing.get_type_hints(annotation)
+            except (NameError, TypeError):
+                hints = dict()
+
+            fields.update({name: converter(hints.get(name, declared)) for name, declared in describe_fields().items()})
+
+        values = json.loads(obj) if isinstance(obj, (str, bytes)) else obj
+
+        if isinstance(values, list) and hasattr(annotation, '_fields'):
+            if len(values) > len(fields):
+                raise ValueError('Expected at most %d items but %d were given' % (len(fields), len(values)))
+
+            return annotation(*[convert_field(value) for convert_field, value in zip(fields.values(), values)])
+
+        if not isinstance(values, dict):
+            raise TypeError("Expected a JSON object but '%s' was given" % type(values).__name__)
+
+        unknown = [name for name in values if name not in fields]
+
+        if len(unknown):
+            raise ValueError('Unexpected field(s) %s' % ', '.join(unknown))
+
+        return annotation(**{name: fields[name](value) for name, value in values.items()})
+
+    return convert
@@ -0,0 +1,239 @@
+"""Counters shared by the worker processes of a node
+
+Worker processes (e.g. of gunicorn) do not share memory, so that in-process throttles and metrics only see a fraction of the requests.
+A counter table is a file mapped into the memory of every worker ('mmap'), holding numbers keyed by hashed names.
+Enable it in Django's settings, preferably with a path on a memory-backed file system:
+---
+    DOREST = {'COUNTERS': {'PATH': '/dev/shm/dorest-counters', 'SLOTS': 65536, 'PERMANENT_SLOTS': 4096, 'METRICS': True}}
+---
+Throttles (see 'throttles') then keep their buckets in the table, and, with 'METRICS', each endpoint counts its calls and their duration:
+---
+    counters.metrics(find_book)     # {'calls': 1024.0, 'errors': 3.0, 'seconds': 12.8}
+---
+
+Each slot holds an 8-byte hash of its name and an 8-byte number.
+Updates are serialized by a lock on the byte range of the slots probed for a name ('fcntl.lockf'), together with a lock for the threads of the process,
+so that workers never lose increments; on platforms without 'fcntl', only the threads of a process are serialized.
+Names whose hashes collide share their slot.
+
+The table is divided in two regions. The first 'PERMANENT_SLOTS' slots (by default, a sixteenth of the table) hold counters that are never freed,
+such as metrics. The others hold expiring counters, whose values are the times at which they expire, such as throttle buckets;
+slots of expired counters are reclaimed by new names. A name finding no free slot among those probed is not counted in the table
+('update' returns None) rather than taking the slot of another counter.
+
+The Dorest project
+:copyright: (c) 2020 Ichise Laboratory at NII & AIST
+:author: Rungsiman Nararatwong
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+DEFAULT_SLOTS = 65536
+MAX_PROBES = 16
+SLOT = struct.Struct('<Qd')
+
+_table = None
+_table_lock = threading.Lock()
+
+
+class CounterTable:
+    """A table of counters in a memory-mapped file shared by processes"""
+
+    def __init__(self, path: str, slots: int = DEFAULT_SLOTS, permanent: int = None):
+        """
+        :param path: Path to the file, which is created if it does not exist
+        :param slots: The number of counters the table holds; processes sharing a file must use the same number
+        :param permanent: The number of slots holding counters that are never freed; by default, a sixteenth of the slots
+        """
+
+        permanent = permanent if permanent is not None else max(slots // 16, MAX_PROBES)
+
+        if permanent < MAX_PROBES or slots - permanent < MAX_PROBES:
+            raise ValueError('Both regions of a counter table must hold at least %d slots' % MAX_PROBES)
+
+        self.path = path
+        self.slots = slots
+        self.permanent = permanent
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+
+        # Growing the file is harmless if another process has already done so, since new bytes are zeros, i.e., empty slots
+        if os.fstat(self._fd).st_size < slots * SLOT.size:
+            os.ftruncate(self._fd, slots * SLOT.size)
+
+        self._map = mmap.mmap(self._fd, slots * SLOT.size)
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> float:
+        """Read a counter
+
+        :param name: The counter's name
+        :return: The counter's value, or zero if it has never been set
+        """
+
+        updated = self.update(name, lambda value: None)
+        return updated[0] if updated is not None else 0.0
+
+    def add(self, name: str, amount: float = 1) -> float:
+        """Increment a counter
+
+        :param name: The counter's name
+        :param amount: The amount to add
+        :return: The counter's new value, or zero if the table has no slot for it
+        """
+
+        updated = self.update(name, lambda value: value + amount)
+        return updated[0] if updated is not None else 0.0
+
+    def update(self, name: str, func: Callable[[float], Optional[float]], *, expired_before: float = None) -> Optional[tuple]:
+        """Read and modify a counter while no other thread or process updates it
+
+        :param name: The counter's name
+        :param func: A function receiving the counter's value (zero if it has never been set),
+                     and returning the new value, or None to leave the counter as it is
+        :param expired_before: Keep the counter among expiring counters, whose values are the times at which they expire,
+                               reclaiming slots of those expired at this time; if None, the counter is permanent
+        :return: A tuple of (the counter's value after the update, the value returned by 'func'),
+                 or None if the name has no slot and none of the probed slots is free
+        """
+
+        key = _hash(name)
+        first, last = (self.permanent, self.slots) if expired_before is not None else (0, self.permanent)
+
+        # Probed slots are consecutive, so that one lock covers all of them
+        offset = (first + key % (last - first - MAX_PROBES + 1)) * SLOT.size
+
+        with self._lock:
+            self._acquire(offset, MAX_PROBES * SLOT.size)
+
+            try:
+                free = None
+
+                for probe in range(MAX_PROBES):
+                    slot_key, value = SLOT.unpack_from(self._map, offset + probe * SLOT.size)
+
+                    if slot_key == key:
+                        break
+
+                    if free is None and (slot_key == 0 or (expired_before is not None and value <= expired_before)):
+                        free = probe
+                else:
+                    if free is None:
+                        return None
+
+                    # Claim an empty slot, or reclaim that of an expired counter, which is equivalent to a missing one
+                    probe, value = free, 0.0
+
+                result = func(value)
+
+                if result is not None:
+                    SLOT.pack_into(self._map, offset + probe * SLOT.size, key, result)
+                    value = result
+
+                return value, result
+
+            finally:
+                self._release(offset, MAX_PROBES * SLOT.size)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._acquire(0, 0)
+
+            try:
+                self._map[:] = bytes(len(self._map))
+            finally:
+                self._release(0, 0)
+
+    def _acquire(self, offset: int, length: int = SLOT.size) -> None:
+        if fcntl is not None:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, length, offset)
+
+    def _release(self, offset: int, length: int = SLOT.size) -> None:
+        if fcntl is not None:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, length, offset)
+
+
+def get_table() -> Optional[CounterTable]:
+    """Retrieve the counter table configured in 'DOREST["COUNTERS"]' of Django's settings, opening it on first use
+
+    :return: The counter table, or None if counters are not configured
+    """
+
+    global _table
+
+    if _table is None:
+        conf = settings.DOREST.get('COUNTERS', None) if hasattr(settings, 'DOREST') else None
+
+        if conf is None:
+            return None
+
+        with _table_lock:
+            if _table is None:
+                _table = CounterTable(conf['PATH'], conf.get('SLOTS', DEFAULT_SLOTS), conf.get('PERMANENT_SLOTS', None))
+
+    return _table
+
+
+def measuring(func: Callable[..., Any], call: Callable[[Dict[str, Any], Any], Any]) -> Callable[[Dict[str, Any], Any], Any]:
+    """Wrap the function that executes an endpoint call (see 'decorators.endpoint') to count calls, errors, and their duration
+
+    :param func: The endpoint function
+    :param call: A function receiving the parsed arguments and the request
+    :return: The wrapped function
+    """
+
+    trace = '%s.%s' % (func.__module__, func.__qualname__)
+
+    def measured_call(parameters: Dict[str, Any], request: Any = None) -> Any:
+        table = get_table()
+        start = time.perf_counter()
+
+        try:
+            return call(parameters, request)
+        except Exception:
+            table.add('metrics:%s:errors' % trace)
+            raise
+        finally:
+            table.add('metrics:%s:calls' % trace)
+            table.add('metrics:%s:seconds' % trace, time.perf_counter() - start)
+
+    return measured_call
+
+
+def metrics(endpoint: Callable[..., Any]) -> Dict[str, float]:
+    """Read the metrics of an endpoint counted by all workers sharing the counter table
+
+    :param endpoint: The endpoint function
+    :return: A dictionary containing the number of calls, the number of failed calls, and their total duration in seconds
+    """
+
+    table, trace = get_table(), '%s.%s' % (endpoint.__module__, endpoint.__qualname__)
+
+    if table is None:
+        return {'calls': 0.0, 'errors': 0.0, 'seconds': 0.0}
+
+    return {name: table.get('metrics:%s:%s' % (trace, name)) for name in ('calls', 'errors', 'seconds')}
+
+
+def enabled(name: str = None) -> bool:
+    """Check whether counters, or one of their uses (e.g. 'METRICS'), are enabled in Django's settings"""
+
+    conf = settings.DOREST.get('COUNTERS', None) if hasattr(settings, 'DOREST') else None
+    return conf is not None and (name is None or bool(conf.get(name, False)))
+
+
+def _hash(name: str) -> int:
+    # Zero marks empty slots
+    return int.from_bytes(hashlib.blake2b(name.encode('utf-8'), digest_size=8).digest(), 'little') or 1
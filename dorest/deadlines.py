@@ -0,0 +1,162 @@
+"""Deadlines of endpoint calls
+
+An endpoint may limit the wall-clock time of its calls, after which the request receives a 504 response, e.g.:
+---
+    @endpoint(['GET'], timeout=5)
+    def search(query: str) -> list:
+        ...
+---
+Python cannot stop a running thread, so the function of a synchronous endpoint is executed on a separate thread pool,
+which lets the request's worker reply as soon as the deadline passes while the function runs to its end in the background.
+Coroutine endpoint functions are cancelled instead.
+The pool's size is configured in Django's settings:
+---
+    DOREST = {'DEADLINES': {'WORKERS': 32}}
+---
+Calls never wait in the pool's queue: while every thread is busy, including those still running calls past their deadlines,
+requests receive a 503 response with a Retry-After header, so that the deadline only counts the time a call actually runs.
+
+The remaining time is available to all code executing the call, e.g., backend functions reached through 'interfaces.resolve'
+and 'packages.call', which raise 'DeadlineExceeded' when resolved after the deadline.
+Long-running functions should check it to cut their work short:
+---
+    def insert(title: str, article: str) -> str:
+        return client.insert({'title': title, 'article': article}, timeout=deadlines.remaining())
+---
+
+The Dorest project
+:copyright: (c) 2020 Ichise Laboratory at NII & AIST
+:author: Rungsiman Nararatwong
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from rest_framework.request import Request
+
+from dorest.exceptions import DeadlineExceeded, EndpointOverloaded
+
+DEFAULT_WORKERS = 32
+RETRY_AFTER = 1
+
+_deadline = contextvars.ContextVar('dorest_deadline', default=None)     # The deadline in seconds of 'time.monotonic'
+
+_runner = None
+_free = None            # A semaphore counting the threads of the runner not executing a call
+_runner_lock = threading.Lock()
+
+
+def remaining() -> Optional[float]:
+    """Find the time remaining until the deadline of the current endpoint call
+
+    :return: Seconds until the deadline (zero once it has passed), or None if the call has no deadline
+    """
+
+    deadline = _deadline.get()
+    return max(deadline - time.monotonic(), 0) if deadline is not None else None
+
+
+def check() -> None:
+    """Stop the current endpoint call if its deadline has passed
+
+    :return: None
+    :raise DeadlineExceeded: If the deadline has passed
+    """
+
+    deadline = _deadline.get()
+
+    if deadline is not None and deadline <= time.monotonic():
+        raise DeadlineExceeded()
+
+
+def bounded(timeout: float, call: Callable[[Dict[str, Any], Request], Any]) -> Callable[[Dict[str, Any], Request], Any]:
+    """Wrap the function that executes an endpoint call (see 'decorators.endpoint') with a deadline
+
+    :param timeout: Seconds the call may take
+    :param call: A function receiving the parsed arguments and the request
+    :return: The wrapped function, which raises 'DeadlineExceeded' once the deadline passes,
+             or 'EndpointOverloaded' if no thread is free to execute the call
+    """
+
+    def bounded_call(parameters: Dict[str, Any], request: Request = None) -> Any:
+        runner = _get_runner()
+
+        if not _free.acquire(blocking=False):
+            raise EndpointOverloaded(wait=RETRY_AFTER)
+
+        deadline = _get_deadline(timeout)
+        token = _deadline.set(deadline)
+
+        try:
+            context = contextvars.copy_context()
+        finally:
+            _deadline.reset(token)
+
+        try:
+            future = runner.submit(context.run, _run, call, parameters, request)
+        except BaseException:
+            _free.release()
+            raise
+
+        try:
+            return future.result(timeout=max(deadline - time.monotonic(), 0))
+        except TimeoutError:
+            raise DeadlineExceeded()
+
+    return bounded_call
+
+
+async def within(timeout: float, awaitable: Awaitable[Any]) -> Any:
+    """Await a coroutine with a deadline, cancelling it once the deadline passes
+
+    :param timeout: Seconds the coroutine may take
+    :param awaitable: The coroutine
+    :return: The coroutine's result
+    """
+
+    deadline = _get_deadline(timeout)
+    token = _deadline.set(deadline)
+
+    try:
+        return await asyncio.wait_for(awaitable, max(deadline - time.monotonic(), 0))
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded()
+    finally:
+        _deadline.reset(token)
+
+
+def _get_deadline(timeout: float) -> float:
+    # A call made within another call keeps the earlier deadline
+    deadline, outer = time.monotonic() + timeout, _deadline.get()
+    return min(deadline, outer) if outer is not None else deadline
+
+
+def _run(call: Callable[[Dict[str, Any], Request], Any], parameters: Dict[str, Any], request: Request) -> Any:
+    close_old_connections()
+
+    try:
+        return call(parameters, request)
+    finally:
+        close_old_connections()
+        _free.release()
+
+
+def _get_runner() -> ThreadPoolExecutor:
+    global _runner, _free
+
+    if _runner is None:
+        with _runner_lock:
+            if _runner is None:
+                conf = settings.DOREST.get('DEADLINES', {}) if hasattr(settings, 'DOREST') else {}
+                workers = conf.get('WORKERS', None) or DEFAULT_WORKERS
+                _free = threading.BoundedSemaphore(workers)
+                _runner = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='dorest-deadline')
+
+    return _runner
@@ -6,9 +6,11 @@ The Dorest project
 """
 
 import importlib
+import inspect
 from functools import wraps
-from typing import Any, Callable, List, Union
+from typing import Any, Callable, Dict, List, Tuple, Union
 
+from asgiref.sync import async_to_sync, sync_to_async
 from django.conf import settings
 from django.utils.translation import ugettext_lazy as _
 
@@ -17,50 +19,166 @@ from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from dorest import arrays, caches, concurrency, counters, deadlines, jobs, permissions, processes, responses
 from dorest.glossary import Glossary
 
 
 def endpoint(methods: List[str], default: bool = False, throttle: str = 'base', requires: Union[tuple, list] = None,
-             include_request: str = None) -> Callable[..., Any]:
+             include_request: str = None, cache_ttl: float = None, cache_size: int = None, cache_vary_on: List[str] = None,
+             cache_vary_on_user: bool = False, cache_backend: str = None, cache_stale: float = None,
+             cache_tags: List[str] = None, invalidates: List[str] = None, coalesce: bool = False,
+             throttle_cost: float = 1, max_concurrency: int = None, queue_timeout: float = None,
+             timeout: float = None, mode: str = None, executor: str = None, batchable: bool = False, batch_window: float = None,
+             batch_size: int = None) -> Callable[..., Any]:
     """Intercept requests and transform them into function calls with arguments
 
+    Endpoint functions may be coroutine functions (defined with 'async def'), which are awaited natively when bound
+    with 'struct.bind(..., asynchronous=True)' under ASGI, or run on an event loop of their own otherwise.
+
     :param methods: HTTP request method
     :param default: Set as module's default endpoint in case no specific function or class name is specified in the request
     :param throttle: Throttle type
     :param requires: A list of required access permissions
     :param include_request: Include 'request' parameter in the function call
-    :return: An output of the function as Django REST Framework's Response object,
+    :param cache_ttl: Cache the function's results for this number of seconds (see 'caches')
+    :param cache_size: Cache the function's results, keeping at most this number of results in the in-process store
+    :param cache_vary_on: Names of the parameters that make up the cache key; by default, all parameters are used
+    :param cache_vary_on_user: Cache results separately for each user, which is always the case if the function receives the request
+    :param cache_backend: Alias of Django's cache backend in which results are kept; by default, results are kept in process memory
+    :param cache_stale: Keep serving an expired result for this number of seconds while it is recomputed in the background
+    :param cache_tags: Tags of the cached results, which are discarded when any of the tags is invalidated
+    :param invalidates: Tags invalidated whenever the function completes successfully, e.g., by modifying the data behind tagged results
+    :param coalesce: Let concurrent calls with identical arguments share one execution of the function (see 'concurrency')
+    :param throttle_cost: The number of tokens each request takes from the throttle scope's bucket (see 'throttles')
+    :param max_concurrency: The maximum number of concurrent calls to the function within a worker process (see 'concurrency')
+    :param queue_timeout: Seconds a request beyond 'max_concurrency' may wait before it is turned away with a 503 response
+    :param timeout: Seconds a call may take before the request receives a 504 response (see 'deadlines')
+    :param mode: Set to 'job' to execute calls as background jobs, replying at once with the job's ID (see 'jobs')
+    :param executor: Set to 'process' to execute calls of a CPU-bound function on a pool of processes (see 'processes')
+    :param batchable: Group concurrent calls and pass the function lists of their arguments, expecting a list of results (see 'concurrency')
+    :param batch_window: Seconds a call waits for other calls to join its group
+    :param batch_size: The maximum number of calls in a group
+    :return: An output of the function as Django REST Framework's Response object (or a streaming response if the output is an iterator),
              or the target function if called directly (not as an endpoint)
     """
 
     endpoint.meta = locals()
 
     def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        asynchronous = inspect.iscoroutinefunction(func)
+
+        def call(parameters: Dict[str, Any], request: Request = None) -> Any:
+            """Call the endpoint function with inputs parsed from an API request"""
+            return func(**parameters) if not asynchronous else async_to_sync(func)(**parameters)
+
+        if executor == 'process':
+            if include_request is not None:
+                raise ValueError("Endpoint '%s' cannot receive the request when executed by a process pool" % func.__qualname__)
+
+            execute = processes.remote(func)
+        else:
+            execute = call
+
+        if batchable:
+            execute = concurrency.MicroBatcher(func, window=batch_window, size=batch_size)(execute)
+
+        if coalesce:
+            execute = concurrency.SingleFlight(func, vary_on_user=include_request is not None,
+                                               exclude=[include_request] if include_request is not None else [])(execute)
+
+        if cache_ttl is not None or cache_size is not None:
+            # A function receiving the request may read its user, so that its results are never shared across users
+            execute = caches.EndpointCache(func, ttl=cache_ttl, size=cache_size, vary_on=cache_vary_on,
+                                           vary_on_user=cache_vary_on_user or include_request is not None,
+                                           backend=cache_backend, exclude=[include_request] if include_request is not None else [],
+                                           stale=cache_stale, tags=cache_tags if cache_tags is not None else [])(execute)
+
+        if invalidates is not None and len(invalidates) > 0:
+            execute = caches.invalidating(invalidates, execute)
+
+        if counters.enabled('METRICS'):
+            execute = counters.measuring(func, execute)
+
+        unbounded = execute
+
+        if timeout is not None:
+            execute = deadlines.bounded(timeout, execute)
+
+        if mode == 'job':
+            execute = jobs.deferring(func, execute)
+
+        admission = concurrency.Admission(func, max_concurrency=max_concurrency, queue_timeout=queue_timeout) \
+            if max_concurrency is not None else None
+
+        async def aexecute(parameters: Dict[str, Any], request: Request = None) -> Any:
+            """Await the endpoint function, or execute it on a worker thread if it is synchronous or its execution involves blocking steps"""
+
+            if asynchronous and unbounded is call and mode != 'job':
+                return await (deadlines.within(timeout, func(**parameters)) if timeout is not None else func(**parameters))
+            else:
+                return await sync_to_async(execute, thread_sensitive=False)(parameters, request)
+
+        def parse(request: Request) -> Dict[str, Any]:
+            # Extract request's body from requests using methods other than GET
+            # A query string may repeat a key, in which case only the first value is taken
+            body = {key: value for key, value in request.data.items()}
+            query = {key: values[0] for key, values in request.GET.lists()}
+            parameters = request.META[Glossary.META_ENDPOINT.value].parse(**{**query, **body})
+
+            if include_request is not None:
+                parameters[include_request] = request
+
+            return parameters
+
+        def respond(request: Request, result: Any) -> Any:
+            # Generators and other iterators are streamed instead of being collected in memory
+            if responses.is_stream(result):
+                return responses.stream(request, result)
+            elif isinstance(result, jobs.Submission):
+                return Response({'data': result}, status=status.HTTP_202_ACCEPTED)
+            else:
+                return Response({'data': result}, status=status.HTTP_200_OK)
+
         @wraps(func)
         def wrapper(*args, **kwargs) -> Any:
             if len(args) == 1 and isinstance(args[0], Request):
+                # Requests beyond the endpoint's concurrency limit are turned away before their arguments are parsed
+                if admission is not None:
+                    admission.acquire()
+
                 try:
                     request = args[0]
-
-                    # Extract request's body from requests using methods other than GET
-                    body = {key: value for key, value in request.data.items()}
-                    parameters = request.META[Glossary.META_ENDPOINT.value].parse(**{**dict(request.GET), **body})
-
-                    if include_request is not None:
-                        parameters[include_request] = request
+                    parameters = parse(request)
 
                     # A request is handled differently based on how the endpoint is defined (as a class or a function)
                     if Glossary.META_CLASS.value in request.META and request.META[Glossary.META_CLASS.value] is not None:
-                        return Response({'data': func(request.META[Glossary.META_CLASS.value][1], **parameters)}, status=status.HTTP_200_OK)
+                        return respond(request, func(request.META[Glossary.META_CLASS.value][1], **parameters))
                     else:
-                        return Response({'data': func(**parameters)}, status=status.HTTP_200_OK)
+                        return respond(request, execute(parameters, request))
 
                 except TypeError as error:
                     return Response({'detail': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+                finally:
+                    if admission is not None:
+                        admission.release()
 
             else:
                 return func(*args, **kwargs)
 
+        async def acall(request: Request) -> Any:
+            """Handle a request without blocking the event loop while the endpoint function is awaited (see 'struct.ahandle')"""
+
+            if admission is not None:
+                await admission.aacquire()
+
+            try:
+                return respond(request, await aexecute(parse(request), request))
+            except TypeError as error:
+                return Response({'detail': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+            finally:
+                if admission is not None:
+                    admission.release()
+
         if hasattr(settings, 'DOREST'):
             throttle_class = settings.DOREST.get('DEFAULT_THROTTLE_CLASSES', None)
 
@@ -68,7 +186,14 @@ def endpoint(methods: List[str], default: bool = False, throttle: str = 'base',
                 throttle_class_branch = [node.split('.') for node in throttle_class]
                 wrapper.throttle_classes = [getattr(importlib.import_module('.'.join(node[:-1])), node[-1]) for node in throttle_class_branch]
 
+        wrapper.renderer_classes = list(APIView.renderer_classes) + [responses.NDJSONRenderer, arrays.ArrayRenderer]
+        wrapper.parser_classes = list(APIView.parser_classes) + [arrays.ArrayParser]
         wrapper.meta = endpoint.meta
+        wrapper.asynchronous = asynchronous
+        wrapper.execute = execute
+        wrapper.aexecute = aexecute
+        wrapper.acall = acall
+        wrapper.admission = admission
 
         if requires is not None:
             wrapper.permission_classes = requires
@@ -95,6 +220,9 @@ def require(validators: Union[tuple, list]):
                         in order to perform an action.
     """
 
+    # The expression is compiled once, so that each request only evaluates it
+    check = _compile_requirement(validators)
+
     def decorator(func):
         def wrapper(*args, **kwargs):
             """Receive HTTP request handler (function) of Django rest_framework's APIView class.
@@ -104,9 +232,9 @@ def require(validators: Union[tuple, list]):
                   [1] an object of rest_framework.request.Request
             """
 
-            if 'request' in kwargs and _require_operator(validators, **kwargs):
+            if 'request' in kwargs and check(**kwargs):
                 return func(*args, **kwargs)
-            elif _require_operator(validators, args[1], args[0], **kwargs):
+            elif check(args[1], args[0], **kwargs):
                 return func(*args, **kwargs)
             else:
                 return Response({'detail': _('Permission required')}, status=403)
@@ -126,33 +254,76 @@ def _require_operator(validators: Union[tuple, list], request: Request, view: AP
     :return: Validation result
     """
 
-    def validate(validator):
-        if type(validator) is tuple or type(validator) is list:
-            return _require_operator(validator, request, view)
+    return _compile_requirement(validators)(request, view, **kwargs)
 
-        elif type(validator) is str:
-            return request.user.has_perm(validator)
 
-        else:
-            validator_instance = validator()
+def _compile_requirement(validators: Union[tuple, list]) -> Callable[..., bool]:
+    """Compile a tuple of validators (see 'require') into a function that evaluates it with short-circuiting
 
-            try:
-                return validator_instance.has_permission(request, view, **kwargs)
-            except TypeError:
-                return validator_instance.has_permission(request, view)
+    Validator classes are instantiated once and reused.
+    Within each group, permission names (checked against the user's permission context, see 'permissions.has_perm')
+    are evaluated before validators that may query the database.
+
+    :param validators: A tuple of validators, a permission name, or a validator
+    :return: A function receiving the request, the view, and the validators' arguments
+    """
+
+    cost, check = _compile_validator(validators)
+    return check
+
+
+def _compile_validator(validator: Any) -> Tuple[int, Callable[..., bool]]:
+    """Compile a validator into a tuple of (its estimated cost, a function evaluating it)"""
 
-    # 'operator_or()' returns a list with 'or' as its first member
-    if type(validators) is not tuple and type(validators) is not list:
-        return validate(validators)
+    if type(validator) is str:
+        return 0, lambda request, view, **kwargs: permissions.has_perm(request, validator)
 
-    elif validators[0] == 'or':
-        return any([validate(v) for v in validators[1:]])
+    if type(validator) is not tuple and type(validator) is not list:
+        instance = validator()
+        accepted = _accepted_arguments(instance.has_permission)
 
-    elif validators[0] == 'not':
-        return not validate(validators[1])
+        if accepted is None:
+            return 1, instance.has_permission
+        else:
+            return 1, lambda request, view, **kwargs: instance.has_permission(request, view, **{key: value for key, value in kwargs.items()
+                                                                                                 if key in accepted})
+
+    # 'operator_or()' returns a tuple with 'or' as its first member
+    if len(validator) > 0 and type(validator[0]) is str and validator[0] == 'not':
+        cost, check = _compile_validator(validator[1])
+        return cost, lambda request, view, **kwargs: not check(request, view, **kwargs)
+
+    disjunctive = len(validator) > 0 and type(validator[0]) is str and validator[0] == 'or'
+    members = [_compile_validator(member) for member in (validator[1:] if disjunctive else validator)]
 
+    # Sorting is stable, so validators of the same cost keep their declared order
+    checks = [check for cost, check in sorted(members, key=lambda member: member[0])]
+    cost = max([cost for cost, check in members], default=0)
+
+    if len(checks) == 1:
+        return cost, checks[0]
+    elif disjunctive:
+        return cost, lambda request, view, **kwargs: any(check(request, view, **kwargs) for check in checks)
     else:
-        return all([validate(v) for v in validators])
+        return cost, lambda request, view, **kwargs: all(check(request, view, **kwargs) for check in checks)
+
+
+def _accepted_arguments(has_permission: Callable[..., bool]) -> Union[set, None]:
+    """Find the arguments, other than the request and the view, accepted by a validator's 'has_permission'
+
+    :param has_permission: A bound 'has_permission' method
+    :return: A set of argument names, or None if any argument is accepted
+    """
+
+    try:
+        parameters = list(inspect.signature(has_permission).parameters.values())
+    except (TypeError, ValueError):
+        return set()
+
+    if any(parameter.kind is inspect.Parameter.VAR_KEYWORD for parameter in parameters):
+        return None
+
+    return {parameter.name for parameter in parameters[2:]}
 
 
 def operator_or(*args):
@@ -5,7 +5,7 @@ The Dorest project
 :author: Rungsiman Nararatwong
 """
 
-from typing import List
+from typing import Any, List
 
 from django.utils.translation import gettext_lazy as _
 
@@ -19,6 +19,28 @@ class ObjectNotFound(APIException):
     default_code = 'object_not_found'
 
 
+class EndpointOverloaded(APIException):
+    """An endpoint is executing its maximum number of concurrent calls, and no call completed while the request was queued"""
+
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = _('Endpoint is overloaded, try again later')
+    default_code = 'endpoint_overloaded'
+
+    def __init__(self, detail: Any = None, code: str = None, wait: float = None):
+        super().__init__(detail, code)
+
+        # Django REST Framework's exception handler sends 'wait' in the Retry-After header
+        self.wait = wait
+
+
+class DeadlineExceeded(APIException):
+    """An endpoint call did not complete within its timeout"""
+
+    status_code = status.HTTP_504_GATEWAY_TIMEOUT
+    default_detail = _('Endpoint did not respond in time')
+    default_code = 'deadline_exceeded'
+
+
 class UnsupportedFileTypeError(Exception):
     """A configuration file must be in either YAML or JSON formats"""
 
@@ -28,3 +50,18 @@ class UnsupportedFileTypeError(Exception):
 
     def __str__(self):
         return "Unsupported file type for '%s'. Accept: %s" % (self.path, ', '.join(self.supported_types))
+
+
+class InvalidArgumentError(TypeError):
+    """An input from an API call cannot be converted to the type of its associated function parameter"""
+
+    def __init__(self, name: str, annotation: Any, value: Any, error: Exception = None):
+        self.name = name
+        self.annotation = annotation
+        self.value = value
+        self.error = error
+
+    def __str__(self):
+        return "Invalid type of argument '%s' (expected '%s' but '%s' was given)%s" \
+               % (self.name, self.annotation.__name__ if isinstance(self.annotation, type) else str(self.annotation), self.value,
+                  ': %s' % self.error if self.error is not None and str(self.error) else '')
@@ -37,6 +37,8 @@ Thus, the 'insert' function in 'db/dba/connector.py' should be:
         return dba_client.insert({'title': title, 'article': article, 'author': author, 'created': created})
 ---
 
+Backends resolved while executing an endpoint call with a deadline (see 'deadlines') are only resolved before the deadline passes.
+
 The Dorest project
 :copyright: (c) 2020 Ichise Laboratory at NII & AIST
 :author: Rungsiman Nararatwong
@@ -48,6 +50,8 @@ import sys
 from typing import Union
 from types import ModuleType
 
+from dorest import deadlines
+
 
 def _get_module(module: Union[str, ModuleType]) -> ModuleType:
     return getattr(sys.modules, module, importlib.import_module(module)) if isinstance(module, str) else module
@@ -95,8 +99,11 @@ def resolve(caller: Union[callable, str, ModuleType]) -> callable:
 
     :param caller: The caller function or a branch indicating the function
     :return: The backend function
+    :raise DeadlineExceeded: If the deadline of the current endpoint call has passed
     """
 
+    deadlines.check()
+
     if callable(caller):
         branch = '%s.%s' % (caller.__module__, caller.__name__)
     else:
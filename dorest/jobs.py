@@ -0,0 +1,186 @@
+"""Background jobs of long-running endpoints
+
+An endpoint in job mode replies at once with the ID of a job, which executes the function in the background, e.g.:
+---
+    @endpoint(['POST'], mode='job')
+    def infer(text: str) -> dict:
+        ...
+---
+The response has status 202 and contains the job's ID and the absolute path to its status:
+---
+    {"data": {"job": "6f1c...", "status": "pending", "path": "/api/_jobs/6f1c..."}}
+---
+'struct.bind' registers a route under the same URL prefix as the endpoints (see 'route'),
+which serves the job's status ('pending', 'running', 'done', or 'failed'), and its result or error once it is finished.
+A job is only visible to the user who submitted it.
+
+Jobs are executed by a thread pool of each worker process, configured in Django's settings:
+---
+    DOREST = {'JOBS': {'WORKERS': 4, 'TTL': 3600, 'BACKEND': 'default'}}
+---
+Finished jobs are kept for 'TTL' seconds, in process memory or, if 'BACKEND' names an alias of Django's cache backends,
+in that backend, which lets any worker sharing the backend serve the status of jobs submitted to other workers.
+
+The Dorest project
+:copyright: (c) 2020 Ichise Laboratory at NII & AIST
+:author: Rungsiman Nararatwong
+"""
+
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.urls import NoReverseMatch, get_script_prefix, reverse
+
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+
+from dorest import caches, responses, verbose
+
+DEFAULT_TTL = 3600
+DEFAULT_WORKERS = 4
+ROUTE = '_jobs'
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+_executor = None
+_executor_lock = threading.Lock()
+_store = None
+_store_lock = threading.Lock()
+_routes = dict()    # A dictionary of {[root package]: ([name of the URL pattern], [URL path to the package])}
+
+
+class Submission(dict):
+    """The reply to a call of an endpoint in job mode, which 'decorators.endpoint' sends with status 202"""
+
+
+def route(root: str, prefix: str) -> str:
+    """Register the route serving statuses of jobs submitted to endpoints within a package of structured endpoints (see 'struct.bind')
+
+    :param root: The name of the root package
+    :param prefix: URL path to the package, as bound in 'urlpatterns' (e.g. 'api/')
+    :return: The name of the route's URL pattern
+    """
+
+    name = 'dorest-jobs-%s' % root
+    _routes[root] = (name, prefix)
+    return name
+
+
+def get(job: str) -> Optional[Dict[str, Any]]:
+    """Retrieve the record of a job
+
+    :param job: The job's ID
+    :return: A dictionary containing the job's ID, status, the submitting user, and the result or error detail; None if the job is unknown
+    """
+
+    found, record = _get_store().get(_key(job))
+    return record if found else None
+
+
+def submit(func: Callable[..., Any], call: Callable[[Dict[str, Any], Request], Any], parameters: Dict[str, Any],
+           request: Request = None) -> Submission:
+    """Execute an endpoint call as a background job
+
+    :param func: The endpoint function
+    :param call: A function receiving the parsed arguments and the request
+    :param parameters: Arguments parsed from the request
+    :param request: The request, if any
+    :return: The job's submission
+    """
+
+    job = uuid.uuid4().hex
+    record = {'job': job, 'status': PENDING, 'user': getattr(getattr(request, 'user', None), 'pk', None),
+              'endpoint': '%s.%s' % (func.__module__, func.__qualname__)}
+
+    _save(record)
+    _get_executor().submit(_run, record, call, parameters, request)
+    return Submission(job=job, status=PENDING, path=_status_path(func, job))
+
+
+def deferring(func: Callable[..., Any], call: Callable[[Dict[str, Any], Request], Any]) -> Callable[[Dict[str, Any], Request], Submission]:
+    """Wrap the function that executes an endpoint call (see 'decorators.endpoint') to execute it as a background job
+
+    :param func: The endpoint function
+    :param call: A function receiving the parsed arguments and the request
+    :return: The wrapped function, which returns the job's submission
+    """
+
+    def deferred_call(parameters: Dict[str, Any], request: Request = None) -> Submission:
+        return submit(func, call, parameters, request)
+
+    return deferred_call
+
+
+def _run(record: Dict[str, Any], call: Callable[[Dict[str, Any], Request], Any], parameters: Dict[str, Any], request: Request) -> None:
+    close_old_connections()
+    _save({**record, 'status': RUNNING})
+
+    try:
+        result = call(parameters, request)
+        _save({**record, 'status': DONE, 'result': list(result) if responses.is_stream(result) else result})
+    except APIException as error:
+        _save({**record, 'status': FAILED, 'detail': error.detail})
+    except Exception as error:
+        verbose.error("Job '%s' of '%s' failed: %s" % (record['job'], record['endpoint'], error))
+        _save({**record, 'status': FAILED, 'detail': str(error)})
+    finally:
+        close_old_connections()
+
+
+def _status_path(func: Callable[..., Any], job: str) -> str:
+    """Find the absolute URL path to the status of a job submitted to an endpoint, or its path relative to the package if it is not bound"""
+
+    roots = [root for root in _routes if func.__module__ == root or func.__module__.startswith('%s.' % root)]
+
+    if not len(roots):
+        return '%s/%s' % (ROUTE, job)
+
+    name, prefix = _routes[max(roots, key=len)]
+
+    try:
+        # Reversing the pattern includes the prefixes of URL configurations including the one that binds the package
+        return reverse(name, kwargs={'job': job})
+    except NoReverseMatch:
+        return '%s%s%s/%s' % (get_script_prefix(), prefix, ROUTE, job)
+
+
+def _save(record: Dict[str, Any]) -> None:
+    _get_store().set(_key(record['job']), record, _get_conf().get('TTL', DEFAULT_TTL))
+
+
+def _key(job: str) -> str:
+    return '%s:job:%s' % (caches.KEY_PREFIX, job)
+
+
+def _get_conf() -> Dict[str, Any]:
+    return settings.DOREST.get('JOBS', {}) if hasattr(settings, 'DOREST') else {}
+
+
+def _get_store() -> Any:
+    global _store
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                backend = _get_conf().get('BACKEND', None)
+                _store = caches.BackendStore(backend) if backend is not None else caches.LocalStore(caches.DEFAULT_SIZE)
+
+    return _store
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=_get_conf().get('WORKERS', DEFAULT_WORKERS), thread_name_prefix='dorest-job')
+
+    return _executor
@@ -36,16 +36,21 @@ The Dorest project
 
 import importlib
 import inspect
-import json
 import re
 import sys
+import threading
 import typing
 from collections import namedtuple
 from typing import Any, Callable, Dict, List, Tuple, Type, Union
 from types import ModuleType
 
+from dorest.converters import converter, guess
+from dorest.exceptions import InvalidArgumentError
 from dorest.glossary import Glossary
 
+_endpoints = dict()     # A dictionary of {[module].[function qualified name]: [Endpoint]}
+_endpoints_lock = threading.Lock()
+
 
 def _get_module(module: Union[str, ModuleType]) -> ModuleType:
     return getattr(sys.modules, module, importlib.import_module(module)) if isinstance(module, str) else module
@@ -57,9 +62,11 @@ class Param:
     In the describing process, the description of each function parameter is stored as an instance of 'Param'
     """
 
-    def __init__(self, name: str, description: List[str] = None, example: List[str] = None, annotation: Type = None, default: Any = None):
+    def __init__(self, name: str, description: List[str] = None, example: List[str] = None, annotation: Type = None, default: Any = None,
+                 hint: Any = None):
         self.name = name
         self.annotation = annotation
+        self.hint = hint if hint is not None else annotation
         self.description = description
         self.example = example
         self.default = default
@@ -81,6 +88,29 @@ class Param:
                 'default': str(self.default) if self.default is not inspect._empty and self.default is not None else ''}
 
 
+def _compile_converter(param: Param) -> Callable[[Any], Any]:
+    """Build a function that converts an input from an API call to the type that matches the function parameter
+
+    The converter is built once per parameter, so that parsing an API request requires only a dictionary lookup per input.
+
+    :param param: The parameter description
+    :return: The converter, which raises 'InvalidArgumentError' on invalid inputs
+    """
+
+    convert = converter(param.hint)
+
+    if convert is guess:
+        return guess
+
+    def convert_argument(obj: Any) -> Any:
+        try:
+            return convert(obj)
+        except (TypeError, ValueError, AttributeError, KeyError) as error:
+            raise InvalidArgumentError(param.name, param.hint, obj, error)
+
+    return convert_argument
+
+
 class Endpoint:
     """Endpoint function descriptor"""
 
@@ -93,6 +123,8 @@ class Endpoint:
         if not hasattr(sys.modules[func.__module__], func.__name__):
             del self.args[0]
 
+        self.converters = {param.name: _compile_converter(param) for param in self.args + self.kwargs}
+
     def rest(self, brief: bool = True) -> Dict[str, Any]:
         """Generate REST-compliant description of the endpoint function
 
@@ -139,57 +171,22 @@ class Endpoint:
 
     def parse(self, *args, **kwargs):
         """Parse inputs from an API request before passing them to the target function
-        :return: A dictionary of both required and optional inputs parsed from an API request
-        """
-
-        def find(name: str) -> Param:
-            """Find a parameter description from parameter name"""
-
-            for parameter in self.args + self.kwargs:
-                if parameter.name == name:
-                    return parameter
-
-            return Param(name)
-
-        def guess(obj: Any) -> Any:
-            """In case the parameter annotation is not provided, guess and try to parse the input"""
-
-            if str(obj).lower() in ['true', 'false']:
-                return obj.lower() == 'true'
-
-            for type_candidate in [float, int]:
-                try:
-                    return type_candidate(obj)
-                except ValueError:
-                    continue
-            
-            try:
-                return json.loads(obj)
-            except json.decoder.JSONDecodeError:
-                return str(obj)
 
-        def convert(param: Param, obj: Any) -> Any:
-            """Convert a string input from an API call to the type that matches its associated function parameter"""
+        Each input is converted by the converter compiled for its associated function parameter (see '_compile_converter').
+        Inputs may either be strings, e.g., from a query string, or values decoded from a JSON request body.
 
-            if param.annotation is None or param.annotation == Union:
-                return guess(obj)
+        :return: A dictionary of both required and optional inputs parsed from an API request
+        """
 
-            if issubclass(param.annotation, bool):
-                return obj.lower() == 'true'
+        converters, parsed = self.converters, dict()
 
-            for type_candidate in [float, int, str]:
-                if issubclass(param.annotation, type_candidate):
-                    return type_candidate(obj)
+        for param, value in zip(self.args, args):
+            parsed[param.name] = converters[param.name](value)
 
-            if any(issubclass(param.annotation, type_candidate) for type_candidate in [list, tuple, dict]):
-                return json.loads(obj)
-            else:
-                raise ValueError("Invalid type of argument '%s' (expected '%s' but '%s' was given)"
-                                 % (param.name, param.annotation.__name__, type(obj).__name__))
+        for key, value in kwargs.items():
+            parsed[key] = converters.get(key, guess)(value)
 
-        required_params = {} if len(args) == 0 else {self.args[i]: args[i] for i in range(len(self.args))}
-        return {**{key.name: convert(key, value[0] if not isinstance(value, str) else value) for key, value in required_params.items()},
-                **{key: convert(find(key), value[0] if not isinstance(value, str) else value) for key, value in kwargs.items()}}
+        return parsed
 
     @property
     def trace(self):
@@ -258,6 +255,12 @@ class Endpoint:
         annotations = dict()
         sig = inspect.signature(self.func)
 
+        # Resolve postponed (string) annotations; the full type hints are kept for the parameter converters
+        try:
+            hints = typing.get_type_hints(self.func)
+        except (NameError, TypeError):
+            hints = dict()
+
         for parameter in sig.parameters:
             try:
                 annotations[parameter] = sig.parameters[parameter].annotation.__origin__
@@ -268,7 +271,8 @@ class Endpoint:
                         description=param_descriptions[param] if param in param_descriptions else None,
                         example=param_examples[param] if param in param_examples else None,
                         annotation=annotations[param],
-                        default=sig.parameters[param].default)
+                        default=sig.parameters[param].default,
+                        hint=hints.get(param, sig.parameters[param].annotation))
                   for param in sig.parameters if param not in param_descriptions or param_descriptions[param][0] != '__hidden__']
 
         return [param for param in params if param.default == sig.empty], [param for param in params if param.default != sig.empty]
@@ -276,3 +280,43 @@ class Endpoint:
     @staticmethod
     def _get_module(module: Union[str, ModuleType]) -> ModuleType:
         return getattr(sys.modules, module, importlib.import_module(module)) if isinstance(module, str) else module
+
+
+def describe(func: Callable[..., Any]) -> Endpoint:
+    """Retrieve the descriptor of an endpoint function from the process-wide registry, creating it on first use
+
+    Descriptors are keyed by the function's module and qualified name. Reloading the module replaces the function object,
+    in which case the stale descriptor is discarded and a new one is created.
+
+    :param func: The endpoint function
+    :return: The endpoint function descriptor
+    """
+
+    key = '%s.%s' % (func.__module__, func.__qualname__)
+    descriptor = _endpoints.get(key, None)
+
+    if descriptor is None or descriptor.func is not func:
+        with _endpoints_lock:
+            descriptor = _endpoints.get(key, None)
+
+            if descriptor is None or descriptor.func is not func:
+                descriptor = _endpoints[key] = Endpoint(func)
+
+    return descriptor
+
+
+def forget(module: Union[str, ModuleType] = None) -> None:
+    """Discard cached endpoint descriptors
+
+    :param module: Discard only descriptors of the functions in this module; if None, discard all descriptors
+    :return: None
+    """
+
+    with _endpoints_lock:
+        if module is None:
+            _endpoints.clear()
+        else:
+            name = module if isinstance(module, str) else module.__name__
+
+            for key in [key for key, descriptor in _endpoints.items() if descriptor.func.__module__ == name]:
+                del _endpoints[key]
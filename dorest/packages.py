@@ -1,5 +1,13 @@
 """Package manager
 
+The catalogue served by 'walk' lists the packages whose permissions the user sending the request satisfies.
+Since permissions are evaluated for every package, their results may be kept per user for a few seconds
+by setting 'DOREST["PACKAGES"]["PERMISSIONS_TTL"]' in Django's settings, provided that they depend on nothing but the user:
+---
+    DOREST = {'PACKAGES': {'PERMISSIONS_TTL': 30}}
+---
+The rendered catalogue is kept for each set of permitted packages, so users sharing the same permissions share the same rendition.
+
 The Dorest project
 :copyright: (c) 2020 Ichise Laboratory at NII & AIST
 :author: Rungsiman Nararatwong
@@ -12,6 +20,7 @@ from functools import partial
 from typing import Union
 from types import ModuleType
 
+from django.conf import settings
 from django.core.handlers.wsgi import WSGIRequest
 from django.urls import re_path
 from django.views.decorators.csrf import csrf_exempt
@@ -21,17 +30,19 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 
-from . import conf as _conf, struct as _struct, resources as dr_resources
+from . import caches as dr_caches, conf as _conf, deadlines as dr_deadlines, struct as _struct, resources as dr_resources, responses as dr_responses
 
 DEFAULT_STRUCTURE = {'struct': 'endpoints', 'resources': 'resources',
                      'conf': 'conf', 'private': 'private', 'templates': 'templates'}
 
+_permitted = dr_caches.LocalStore()     # A dictionary of {([site], [user's primary key]): [tuple of permitted packages]}
+
 
 def _get_module(module: Union[str, ModuleType]) -> ModuleType:
     return getattr(sys.modules, module, importlib.import_module(module)) if isinstance(module, str) else module
 
 
-def bind(site: Union[str, ModuleType], *, to: Union[str, ModuleType], url: str = None) -> None:
+def bind(site: Union[str, ModuleType], *, to: Union[str, ModuleType], url: str = None, asynchronous: bool = False) -> None:
     def resolve_module(key: str, partial_path: Union[bool, str]) -> str:
         if partial_path is None:
             return '%s.%s' % (package.__name__.replace('.package', ''), DEFAULT_STRUCTURE[key].replace('/', '.'))
@@ -78,11 +89,11 @@ def bind(site: Union[str, ModuleType], *, to: Union[str, ModuleType], url: str =
 
                 if pkg_conf['urls']['struct'] is None:
                     _struct.bind(pkg_struct, to=caller, url='%s%s/' % ('' if url is None else '%s/' % url.strip('/'),
-                                                                       pkg_conf['urls']['root'].strip('/')))
+                                                                       pkg_conf['urls']['root'].strip('/')), asynchronous=asynchronous)
                 else:
                     _struct.bind(pkg_struct, to=caller, url='%s%s/%s/' % ('' if url is None else '%s/' % url.strip('/'),
                                                                           pkg_conf['urls']['root'].strip('/'),
-                                                                          pkg_conf['urls']['struct'].strip('/')))
+                                                                          pkg_conf['urls']['struct'].strip('/')), asynchronous=asynchronous)
             except ModuleNotFoundError:
                 pkg_struct = None
 
@@ -119,6 +130,9 @@ def requires(module: Union[str, ModuleType], *, permissions: Union[list, tuple]
 
 
 def call(branch: str, *, by: Union[str, ModuleType]) -> callable:
+    # Functions of other packages are not reached after the deadline of the current endpoint call (see 'deadlines')
+    dr_deadlines.check()
+
     caller = _get_module(by).__name__
     path = caller.split('.')
     root = None
@@ -144,18 +158,46 @@ def call(branch: str, *, by: Union[str, ModuleType]) -> callable:
 @permission_classes([AllowAny])
 def walk(request: WSGIRequest, root: Union[str, ModuleType]) -> Response:
     site = _get_module(root)
+    reduce = 'reduce' in request.GET
     package_endpoints = {}
 
-    for package in getattr(site, '__packages', []):
-        permissions = getattr(package, '__permissions', [])
+    for package in _get_permitted_packages(request, site):
+        for key, pkg_struct in getattr(package, '__struct', {}).items():
+            package_endpoints[key] = _struct.walk_endpoints(pkg_struct.__name__, reduce)
+
+    if dr_responses.accepts(request):
+        return dr_responses.reply(request, dr_responses.render(('packages', site.__name__, reduce, tuple(package_endpoints)),
+                                                               source=tuple(package_endpoints.values()),
+                                                               content=lambda: {'packages': package_endpoints}))
+    else:
+        return Response({'packages': package_endpoints}, status=status.HTTP_200_OK)
+
+
+# Package permissions receive the same view on every call, rather than a view built for each check
+_walk_view = api_view()(walk)
+
+
+def _get_permitted_packages(request: WSGIRequest, site: ModuleType) -> tuple:
+    """List the packages of a site whose permissions the user sending the request satisfies
+
+    :param request: A request sent from Django REST Framework
+    :param site: The site's module
+    :return: A tuple of packages
+    """
+
+    ttl = settings.DOREST.get('PACKAGES', {}).get('PERMISSIONS_TTL', None) if hasattr(settings, 'DOREST') else None
+    key = (site.__name__, getattr(getattr(request, 'user', None), 'pk', None))
+
+    if ttl is not None:
+        found, permitted = _permitted.get(key)
+
+        if found:
+            return permitted
 
-        if all(permission().has_permission(request, api_view()(walk)) for permission in permissions):
-            for key, pkg_struct in getattr(package, '__struct', {}).items():
-                package_endpoints[key] = _struct.walk_endpoints(pkg_struct.__name__, 'reduce' in request.GET)
+    permitted = tuple(package for package in getattr(site, '__packages', [])
+                      if all(permission().has_permission(request, _walk_view) for permission in getattr(package, '__permissions', [])))
 
-            # print(request.user)
-            # print(getattr(package, '__permissions'))
-            # print(getattr(package, '__permissions')[0]().has_permission(request, api_view()(walk)))
-            # print(api_view()(walk))
+    if ttl is not None:
+        _permitted.set(key, permitted, ttl)
 
-    return Response({'packages': package_endpoints}, status=status.HTTP_200_OK)
+    return permitted
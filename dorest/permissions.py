@@ -1,13 +1,102 @@
 """Implementations of additional Django REST Framework permission validators
 
+Validators answer from a permission context (see 'context'), which loads the names of the user's groups
+and the user's permissions once per request, rather than querying the database for every check.
+The context may also be kept for a few seconds per user by setting 'DOREST["PERMISSIONS"]["CONTEXT_TTL"]' in Django's settings,
+sparing repeated requests of the same user from loading it again:
+---
+    DOREST = {'PERMISSIONS': {'CONTEXT_TTL': 5}}
+---
+
 The Dorest project
 :copyright: (c) 2020 Ichise Laboratory at NII & AIST
 :author: Rungsiman Nararatwong
 """
 
+from typing import Any
+
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 
 from rest_framework.permissions import BasePermission
+from rest_framework.request import Request
+
+from dorest import caches
+
+_contexts = caches.LocalStore()     # A dictionary of {[user's primary key]: [PermissionContext]}
+
+
+class PermissionContext:
+    """Names of a user's groups and the user's permissions, loaded once"""
+
+    def __init__(self, user: Any):
+        active = user is not None and getattr(user, 'is_active', False)
+
+        self.superuser = active and getattr(user, 'is_superuser', False)
+        self.groups = frozenset(user.groups.values_list('name', flat=True)) if active and hasattr(user, 'groups') else frozenset()
+        self.permissions: frozenset = frozenset(user.get_all_permissions()) if active else frozenset()
+
+    def in_group(self, name: str) -> bool:
+        return name in self.groups
+
+    def has_perm(self, permission: str) -> bool:
+        """Check a permission as 'User.has_perm' would, without an object"""
+        return self.superuser or permission in self.permissions
+
+
+def context(request: Request) -> PermissionContext:
+    """Retrieve the permission context of the user sending a request
+
+    The context is kept on the user object, which is shared by every check made while handling the request,
+    including the packages listed by 'packages.walk' and the calls of a batch.
+
+    :param request: A request sent from Django REST Framework
+    :return: The user's permission context
+    """
+
+    user = getattr(request, 'user', None)
+    permission_context = getattr(user, '_dorest_permission_context', None)
+
+    if permission_context is not None:
+        return permission_context
+
+    ttl = settings.DOREST.get('PERMISSIONS', {}).get('CONTEXT_TTL', None) if hasattr(settings, 'DOREST') else None
+    pk = getattr(user, 'pk', None)
+
+    if ttl is not None and pk is not None:
+        found, permission_context = _contexts.get(pk)
+
+        if not found:
+            permission_context = PermissionContext(user)
+            _contexts.set(pk, permission_context, ttl)
+    else:
+        permission_context = PermissionContext(user)
+
+    if user is not None:
+        try:
+            user._dorest_permission_context = permission_context
+        except AttributeError:
+            pass
+
+    return permission_context
+
+
+def has_perm(request: Request, permission: str) -> bool:
+    """Check a permission of the user sending a request, as 'User.has_perm' would, without an object
+
+    Permissions missing from the user's permission context, e.g. those granted by authentication backends
+    that do not list them in 'get_all_permissions', are checked with 'User.has_perm'.
+
+    :param request: A request sent from Django REST Framework
+    :param permission: The permission name, e.g. 'app.change_article'
+    :return: True if the user has the permission
+    """
+
+    if context(request).has_perm(permission):
+        return True
+
+    user = getattr(request, 'user', None)
+    return user is not None and user.has_perm(permission)
 
 
 class OR(BasePermission):
@@ -50,18 +139,18 @@ class IsAccountManager(BasePermission):
     """Validate whether the account sending the request has the permission to manage other accounts"""
 
     def has_permission(self, request, view):
-        return len(request.user.groups.filter(name='user_manager')) > 0
+        return context(request).in_group('user_manager')
 
 
 class IsDemoUser(BasePermission):
     """Validate whether the account is for demonstration"""
 
     def has_permission(self, request, view):
-        return len(request.user.groups.filter(name='user_demo')) > 0
+        return context(request).in_group('user_demo')
 
 
 class IsTrustedUser(BasePermission):
     """Validate whether the account is trusted"""
 
     def has_permission(self, request, view):
-        return len(request.user.groups.filter(name='user_trusted')) > 0
+        return context(request).in_group('user_trusted')
@@ -0,0 +1,131 @@
+"""Execution of CPU-bound endpoints on a process pool
+
+Threads of a worker process take turns holding Python's global interpreter lock, so that CPU-bound endpoint functions
+cannot use more than one core per worker. Such endpoints may execute their calls on a pool of processes instead:
+---
+    @endpoint(['GET'], executor='process')
+    def factorize(n: int) -> list:
+        ...
+---
+Arguments parsed from the request are sent to a process of the pool, which imports the endpoint's module, calls the function,
+and sends its result back; both must therefore be picklable. Iterators returned by the function are collected into lists,
+and functions cannot receive the request ('include_request').
+
+The pool is shared by all such endpoints of a worker process and configured in Django's settings:
+---
+    DOREST = {'PROCESSES': {'WORKERS': 8, 'MAX_TASKS_PER_CHILD': 1000, 'START_METHOD': 'spawn'}}
+---
+'MAX_TASKS_PER_CHILD' (Python 3.11 or later) replaces processes after that many calls, e.g. to reclaim leaked memory.
+The pool is started, with all of its processes, on the first call, or earlier by calling 'warm',
+e.g., in a worker's post-fork hook; it must not be started before a server forks its workers.
+
+The Dorest project
+:copyright: (c) 2020 Ichise Laboratory at NII & AIST
+:author: Rungsiman Nararatwong
+"""
+
+import asyncio
+import importlib
+import inspect
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict
+
+from django.conf import settings
+
+from rest_framework.request import Request
+
+from dorest import responses, verbose
+
+DEFAULT_START_METHOD = 'spawn'
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def warm() -> ProcessPoolExecutor:
+    """Start the process pool, if not yet started, with all of its processes ready to execute calls
+
+    :return: The process pool
+    """
+
+    global _pool
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                conf = settings.DOREST.get('PROCESSES', {}) if hasattr(settings, 'DOREST') else {}
+                workers = conf.get('WORKERS', None) or os.cpu_count() or 1
+                options = {'max_workers': workers, 'initializer': _initialize,
+                           'mp_context': multiprocessing.get_context(conf.get('START_METHOD', DEFAULT_START_METHOD))}
+
+                if conf.get('MAX_TASKS_PER_CHILD', None) is not None:
+                    if sys.version_info >= (3, 11):
+                        options['max_tasks_per_child'] = conf['MAX_TASKS_PER_CHILD']
+                    else:
+                        verbose.warn("'MAX_TASKS_PER_CHILD' requires Python 3.11 or later and is ignored")
+
+                pool = ProcessPoolExecutor(**options)
+
+                # Processes are otherwise started one by one as calls arrive
+                for future in [pool.submit(os.getpid) for _ in range(workers)]:
+                    future.result()
+
+                _pool = pool
+
+    return _pool
+
+
+def remote(func: Callable[..., Any]) -> Callable[[Dict[str, Any], Request], Any]:
+    """Build a function that executes calls to an endpoint function on the process pool (see 'decorators.endpoint')
+
+    :param func: The endpoint function, which must be defined at the top level of its module
+    :return: A function receiving the parsed arguments and the request
+    """
+
+    module, name = func.__module__, func.__qualname__
+
+    def remote_call(parameters: Dict[str, Any], request: Request = None) -> Any:
+        global _pool
+
+        pool = warm()
+
+        try:
+            return pool.submit(_invoke, module, name, parameters).result()
+        except BrokenProcessPool:
+            # A process died abruptly (e.g. killed for its memory); the next call starts a new pool
+            with _pool_lock:
+                if _pool is pool:
+                    _pool = None
+
+            raise
+
+    return remote_call
+
+
+def _initialize() -> None:
+    import django
+
+    # Processes started with 'spawn' or 'forkserver' import Django afresh
+    django.setup()
+
+
+def _invoke(module: str, name: str, parameters: Dict[str, Any]) -> Any:
+    """Call an endpoint function within a process of the pool"""
+
+    target = importlib.import_module(module)
+
+    for attribute in name.split('.'):
+        target = getattr(target, attribute)
+
+    # The endpoint decorator calls the function directly if it does not receive a request
+    result = target(**parameters)
+
+    if inspect.iscoroutine(result):
+        result = asyncio.run(result)
+
+    return list(result) if responses.is_stream(result) else result
@@ -0,0 +1,219 @@
+"""Pre-rendered responses
+
+Descriptions of structured API endpoints rarely change once the endpoints are bound,
+yet the API catalogue is requested over and over by clients that poll for changes.
+A 'Rendition' serializes such a description to JSON once, keeps its compressed variants as they are requested,
+and tags each variant with a strong ETag derived from the serialized content and its content coding, e.g.:
+---
+    rendition = responses.render(('help', 'api.pkg.module.func'), source=descriptor, content=lambda: {'help': descriptor.rest()})
+    return responses.reply(request, rendition)
+---
+A request carrying a matching 'If-None-Match' header receives '304 Not Modified' with an empty body.
+
+Results of endpoint functions that return generators or other iterators are streamed (see 'stream')
+instead of being collected in memory before rendering.
+
+The Dorest project
+:copyright: (c) 2020 Ichise Laboratory at NII & AIST
+:author: Rungsiman Nararatwong
+"""
+
+import collections.abc
+import gzip
+import hashlib
+import json
+import zlib
+from typing import Any, Callable, Hashable, Iterable, Iterator, List
+
+from django.core.handlers.wsgi import WSGIRequest
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+SUPPORTED_ENCODINGS = {'gzip': gzip.compress, 'deflate': zlib.compress}
+NDJSON_MEDIA_TYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_renditions = dict()    # A dictionary of {[key]: [Rendition]}
+
+
+class NDJSONRenderer(JSONRenderer):
+    """Render newline-delimited JSON, writing each item of the result, or the whole response if it has no list of items, on its own line
+
+    Endpoints accept this media type so that their streamed results may be requested as NDJSON (see 'stream').
+    """
+
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def render(self, data: Any, accepted_media_type: str = None, renderer_context: dict = None) -> bytes:
+        items = data['data'] if isinstance(data, dict) and isinstance(data.get('data', None), list) else [data]
+        return b''.join(super(NDJSONRenderer, self).render(item, 'application/json', renderer_context) + b'\n' for item in items)
+
+
+class Rendition:
+    """JSON content serialized to bytes, along with its compressed variants and their ETags"""
+
+    def __init__(self, content: Any, source: Any = None):
+        self.source = source
+        self.body = json.dumps(content, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self.etag = '"%s"' % hashlib.sha1(self.body).hexdigest()
+        self._encoded = {'identity': self.body}
+
+    def encode(self, encoding: str) -> bytes:
+        """Return the body compressed with the given content coding, compressing it on first use
+
+        :param encoding: A content coding in 'SUPPORTED_ENCODINGS' or 'identity'
+        :return: The encoded body
+        """
+
+        if encoding not in self._encoded:
+            self._encoded[encoding] = SUPPORTED_ENCODINGS[encoding](self.body)
+
+        return self._encoded[encoding]
+
+    def etag_for(self, encoding: str) -> str:
+        """Return the ETag of the variant with the given content coding, e.g., '"<sha1>"' for identity and '"<sha1>-gzip"' for gzip
+
+        :param encoding: A content coding in 'SUPPORTED_ENCODINGS' or 'identity'
+        :return: The strong ETag, quoted
+        """
+
+        return self.etag if encoding == 'identity' else '"%s-%s"' % (self.etag.strip('"'), encoding)
+
+
+def render(key: Hashable, *, source: Any, content: Callable[[], Any]) -> Rendition:
+    """Retrieve a cached rendition, rendering the content again if the rendition was made from a different source
+
+    :param key: A key identifying the rendition
+    :param source: The object, or a tuple of objects, from which the content is derived (e.g. cached API trees);
+                   a rendition is reused as long as its source consists of the same objects
+    :param content: A function that returns the content to be rendered
+    :return: The rendition
+    """
+
+    rendition = _renditions.get(key, None)
+
+    if rendition is None or not _is_same(rendition.source, source):
+        rendition = _renditions[key] = Rendition(content(), source)
+
+    return rendition
+
+
+def accepts(request: WSGIRequest) -> bool:
+    """Check whether a pre-rendered JSON response is acceptable, leaving requests from web browsers to Django REST Framework's renderers
+
+    :param request: A request sent from Django REST Framework
+    :return: True if the client does not ask for HTML
+    """
+
+    return 'text/html' not in request.META.get('HTTP_ACCEPT', '')
+
+
+def reply(request: WSGIRequest, rendition: Rendition, status: int = status.HTTP_200_OK) -> HttpResponse:
+    """Create a response from a rendition, honoring 'If-None-Match' and 'Accept-Encoding' request headers
+
+    :param request: A request sent from Django REST Framework
+    :param rendition: The rendition
+    :param status: HTTP status code
+    :return: Django's HttpResponse object
+    """
+
+    encoding = _negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    etag = rendition.etag_for(encoding)
+    etags = _parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+
+    # Browsers receive HTML from Django REST Framework's renderers instead (see 'accepts'), so the response also varies with 'Accept'
+    if etag in etags or '*' in etags:
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        response['Vary'] = 'Accept, Accept-Encoding'
+        return response
+
+    response = HttpResponse(rendition.encode(encoding), content_type='application/json', status=status)
+    response['ETag'] = etag
+    response['Vary'] = 'Accept, Accept-Encoding'
+
+    if encoding != 'identity':
+        response['Content-Encoding'] = encoding
+
+    return response
+
+
+def is_stream(result: Any) -> bool:
+    """Check whether the result of an endpoint function should be streamed, i.e., it is a generator or another kind of iterator"""
+    return isinstance(result, collections.abc.Iterator)
+
+
+def stream(request: WSGIRequest, result: Iterable[Any], status: int = status.HTTP_200_OK) -> StreamingHttpResponse:
+    """Create a response that renders the items of an iterable one by one as they are produced
+
+    By default, the items are written as a JSON array in the same envelope as other results, i.e., '{"data": [ ... ]}'.
+    If the request accepts one of 'NDJSON_MEDIA_TYPES', the items are written as newline-delimited JSON instead, one item per line.
+    Rendered items are sent in chunks of about 'STREAM_CHUNK_SIZE' bytes.
+
+    :param request: A request sent from Django REST Framework
+    :param result: The iterable
+    :param status: HTTP status code
+    :return: Django's StreamingHttpResponse object
+    """
+
+    accept = request.META.get('HTTP_ACCEPT', '')
+    ndjson = next((media_type for media_type in NDJSON_MEDIA_TYPES if media_type in accept), None)
+    encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+    if ndjson is not None:
+        chunks = _chunk(encoder.encode(item) + '\n' for item in result)
+    else:
+        chunks = _chunk(_json_array(encoder, result))
+
+    return StreamingHttpResponse(chunks, content_type=ndjson or 'application/json', status=status)
+
+
+def _json_array(encoder: JSONEncoder, result: Iterable[Any]) -> Iterator[str]:
+    yield '{"data":['
+
+    for i, item in enumerate(result):
+        yield encoder.encode(item) if i == 0 else ',' + encoder.encode(item)
+
+    yield ']}'
+
+
+def _chunk(parts: Iterable[str]) -> Iterator[bytes]:
+    buffer, size = [], 0
+
+    for part in parts:
+        buffer.append(part)
+        size += len(part)
+
+        if size >= STREAM_CHUNK_SIZE:
+            yield ''.join(buffer).encode('utf-8')
+            buffer, size = [], 0
+
+    if len(buffer):
+        yield ''.join(buffer).encode('utf-8')
+
+
+def _is_same(a: Any, b: Any) -> bool:
+    if isinstance(a, tuple) and isinstance(b, tuple):
+        return len(a) == len(b) and all(x is y for x, y in zip(a, b))
+    else:
+        return a is b
+
+
+def _parse_etags(header: str) -> List[str]:
+    return [etag.strip().replace('W/', '', 1) for etag in header.split(',') if etag.strip()]
+
+
+def _negotiate_encoding(header: str) -> str:
+    """Select the first supported content coding accepted by the client, ignoring those with zero quality"""
+
+    for item in header.split(','):
+        coding, _, parameters = item.strip().partition(';')
+
+        if coding.strip().lower() in SUPPORTED_ENCODINGS and parameters.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            return coding.strip().lower()
+
+    return 'identity'
@@ -10,24 +10,41 @@ import inspect
 import re
 import os
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
-from typing import Any, Callable, List, Tuple, Type, Union
+from typing import Any, Callable, Dict, List, Tuple, Type, Union
 from types import ModuleType
 
-from django.conf import settings
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
 from django.core.handlers.wsgi import WSGIRequest
+from django.db import close_old_connections
+from django.http.response import HttpResponseBase
 from django.urls import include, path, re_path, resolve
 from django.views.decorators.csrf import csrf_exempt
 
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.exceptions import MethodNotAllowed
+from rest_framework.exceptions import APIException, MethodNotAllowed
 from rest_framework.permissions import AllowAny
+from rest_framework.request import Request, clone_request
 from rest_framework.response import Response
 
+from dorest.exceptions import ObjectNotFound
 from dorest.glossary import Glossary
 from dorest.meta import Endpoint
-from dorest import meta
+from dorest import jobs, meta, responses, throttles, verbose
+
+_routes = dict()    # A dictionary of {[root package]: {[branch]: {[HTTP method or '*']: ([endpoint], [class])}}}
+_route_specs = dict()   # A dictionary of {([root package], [module]): [module specification when the route table was built]}
+_routes_lock = threading.Lock()
+_views = dict()     # A dictionary of {([endpoint], [HTTP method]): [Django REST Framework's view]}
+_views_lock = threading.Lock()
+_trees = dict()     # A dictionary of {([branch], [reduce]): ([module specifications], [description of the tree])}
+_trees_lock = threading.Lock()
+_batch_executors = dict()   # A dictionary of {[number of workers]: [thread pool]}
+_batch_executors_lock = threading.Lock()
 
 
 def _get_module(module: Union[str, ModuleType]) -> ModuleType:
@@ -87,6 +104,77 @@ def _get_endpoint(method: str, branch: str, module: ModuleType = None) -> Tuple[
             raise AttributeError("Could not find endpoint '%s' with HTTP request method '%s' in '%s'" % (target_function, method, module))
 
 
+def _walk_modules(branch: str) -> List[str]:
+    """List all modules within a package, including the package itself
+
+    :param branch: The root of structured API endpoints (or a part of interest within the structure)
+    :return: A list of modules in Python's import format
+    """
+
+    root_module = importlib.import_module(branch)
+    root_path = os.path.dirname(root_module.__file__)
+
+    # Generate a list of all Python scripts
+    py_files = [os.path.join(dirpath, filename) for dirpath, dirnames, filenames in os.walk(root_path) for filename in filenames
+                if os.path.splitext(filename)[1] == '.py']
+
+    # Generate a list of all modules for import from the list of Python scripts
+    return [('%s.%s' % (branch, py_file.replace(root_path, '').replace('__init__', '').replace('.py', '')
+                        .replace('/', '.').strip('.'))).strip('.') for py_file in py_files]
+
+
+def _compile_routes(package: ModuleType) -> Dict[str, Dict[str, Tuple[Callable[..., Any], Union[Type, None]]]]:
+    """Build a route table of all endpoints within a package of structured endpoints
+
+    The table maps each branch to the endpoints it resolves to, following the same rules as '_get_endpoint':
+    a module resolves to its default (or last) endpoint regardless of the request method, or to the targets of its redirect operators,
+    while a function resolves to itself for each of its accepted methods.
+
+    Branches that cannot be resolved in advance are left out of the table, in which case 'handle' falls back to '_get_endpoint'.
+
+    :param package: The root package of the structured endpoints
+    :return: A dictionary of {[branch]: {[HTTP method or '*']: ([endpoint], [class])}}
+    """
+
+    table = dict()
+
+    for module_name in _walk_modules(package.__name__):
+        try:
+            module = importlib.import_module(module_name)
+        except Exception as error:
+            verbose.warn("Could not import '%s' while building the route table: %s" % (module_name, error))
+            continue
+
+        funcs = [obj for obj in [getattr(module, attr) for attr in dir(module)]
+                 if hasattr(obj, 'meta') and getattr(obj, '__module__', None) == module.__name__]
+
+        for func in funcs:
+            if inspect.isfunction(func):
+                table['%s.%s' % (module_name, func.__name__)] = {method: (func, None) for method in func.meta['methods']}
+
+        if len(funcs):
+            defaults = [func for func in funcs if func.meta['default']]
+            table[module_name] = {'*': (defaults[0] if len(defaults) else funcs[-1], None)}
+
+        elif hasattr(module, Glossary.REDIRECT.value):
+            routes = dict()
+
+            for method in getattr(module, Glossary.REDIRECT.value):
+                try:
+                    routes[method.upper()] = _get_endpoint(method.upper(), module_name)
+                except (AttributeError, KeyError, ModuleNotFoundError):
+                    continue
+
+            table[module_name] = routes
+
+    # Record the modules of the endpoints, so that a route whose module is reloaded can be detected (see '_resolve')
+    for routes in table.values():
+        for endpoint, cls in routes.values():
+            _route_specs[(package.__name__, endpoint.__module__)] = getattr(sys.modules.get(endpoint.__module__, None), '__spec__', None)
+
+    return table
+
+
 def walk_endpoints(branch: str, reduce: bool = False) -> dict:
     """Walk and generate descriptions of structured API endpoints
 
@@ -114,11 +202,33 @@ def walk_endpoints(branch: str, reduce: bool = False) -> dict:
         }
     ---
 
+    Descriptions are generated once per branch and 'reduce' flag, then served from memory until any of the modules is reloaded.
+
     :param branch: The root of structured API endpoints (or a part of interest within the structure)
     :param reduce: Reduce the returned dictionary
     :return: A description of the tree
     """
 
+    cached = _trees.get((branch, reduce), None)
+
+    if cached is None or not _is_current(cached[0]):
+        with _trees_lock:
+            cached = _trees.get((branch, reduce), None)
+
+            if cached is None or not _is_current(cached[0]):
+                specs, api_tree = _describe_tree(branch)
+                cached = _trees[(branch, reduce)] = (specs, api_tree if not reduce else Endpoint.reduce(api_tree))
+
+    return cached[1]
+
+
+def _describe_tree(branch: str) -> Tuple[List[Tuple[str, Any]], dict]:
+    """Import all modules within a branch and generate descriptions of their endpoints (see 'walk_endpoints')
+
+    :param branch: The root of structured API endpoints (or a part of interest within the structure)
+    :return: A tuple containing the module specifications, which identify the imported modules, and the description of the tree
+    """
+
     def attach_endpoint(sub_api_tree: dict, sub_branch: List[str], endpoint: callable) -> None:
         if len(sub_branch):
             sub_branch_head = sub_branch.pop(0)
@@ -130,20 +240,11 @@ def walk_endpoints(branch: str, reduce: bool = False) -> dict:
 
         else:
             if '*' not in sub_api_tree:
-                sub_api_tree['*'] = [Endpoint(endpoint).rest(brief=True)]
+                sub_api_tree['*'] = [meta.describe(endpoint).rest(brief=True)]
             else:
-                sub_api_tree['*'].append(Endpoint(endpoint).rest(brief=True))
-
-    root_module = importlib.import_module(branch)
-    root_path = os.path.dirname(root_module.__file__)
-
-    # Generate a list of all Python scripts
-    py_files = [os.path.join(dirpath, filename) for dirpath, dirnames, filenames in os.walk(root_path) for filename in filenames
-                if os.path.splitext(filename)[1] == '.py']
+                sub_api_tree['*'].append(meta.describe(endpoint).rest(brief=True))
 
-    # Generate a list of all modules for import from the list of Python scripts
-    modules = [('%s.%s' % (branch, py_file.replace(os.path.dirname(root_module.__file__), '').replace('__init__', '').replace('.py', '')
-                           .replace('/', '.').strip('.'))).strip('.') for py_file in py_files]
+    modules = _walk_modules(branch)
 
     # Remove the root endpoint
     modules = [module for module in modules if module != branch]
@@ -159,7 +260,31 @@ def walk_endpoints(branch: str, reduce: bool = False) -> dict:
         for func in funcs:
             attach_endpoint(api_tree, sub_branch.split('.'), func)
 
-    return api_tree if not reduce else Endpoint.reduce(api_tree)
+    return [(module, sys.modules[module].__spec__) for module in modules], api_tree
+
+
+def _is_current(specs: List[Tuple[str, Any]]) -> bool:
+    """Check whether none of the modules has been reloaded since their specifications were recorded
+
+    'importlib.reload' assigns a new specification to the reloaded module.
+
+    :param specs: A list of (module, specification) tuples
+    :return: True if all modules are still the ones that were recorded
+    """
+
+    return all(getattr(sys.modules.get(module, None), '__spec__', None) is spec for module, spec in specs)
+
+
+def forget(branch: str = None) -> None:
+    """Discard cached descriptions of structured API endpoints, e.g., after adding new modules at runtime
+
+    :param branch: Discard only descriptions of this branch; if None, discard all descriptions
+    :return: None
+    """
+
+    with _trees_lock:
+        for key in [key for key in _trees if branch is None or key[0] == branch]:
+            del _trees[key]
 
 
 @api_view(['DELETE', 'GET', 'PATCH', 'POST', 'PUT'])
@@ -177,6 +302,96 @@ def _reply(request: WSGIRequest, topic: str, message: Union[dict, str], status:
     return Response({topic: message}, status=status)
 
 
+def _get_view(endpoint: Callable[..., Any], method: str) -> Callable[..., Any]:
+    """Retrieve the Django REST Framework's view wrapping an endpoint function, creating it on first use
+
+    :param endpoint: The endpoint function
+    :param method: HTTP request method
+    :return: Django REST Framework's view
+    """
+
+    view = _views.get((endpoint, method), None)
+
+    if view is None:
+        with _views_lock:
+            view = _views.get((endpoint, method), None)
+
+            if view is None:
+                view = api_view([method])(endpoint)
+
+                if getattr(endpoint, 'meta')['throttle'] in throttles.get_rates():
+                    view.view_class.throttle_custom_scope = getattr(endpoint, 'meta')['throttle']
+                    view.view_class.throttle_cost = getattr(endpoint, 'meta').get('throttle_cost', 1)
+
+                _views[(endpoint, method)] = view
+
+    return view
+
+
+def _resolve(method: str, branch: str, root: Union[str, ModuleType]) -> Tuple[Callable[..., Any], Union[Type, None]]:
+    """Resolve the target endpoint, first from the route table, then from the packages (see '_get_endpoint')
+
+    :param method: HTTP request method
+    :param branch: A branch in Python's import format (e.g. 'root.pkg_a.module_a.func')
+    :param root: The root package of the structured endpoints
+    :return: A tuple containing the target endpoint function and, if applicable, its class
+    """
+
+    root_name = root if isinstance(root, str) else root.__name__
+    routes = _routes.get(root_name, {}).get(branch, None)
+
+    if routes is None:
+        return _get_endpoint(method, branch, root if isinstance(root, str) else None)
+    elif method in routes or '*' in routes:
+        endpoint, cls = routes.get(method, routes.get('*'))
+
+        if _is_current([(endpoint.__module__, _route_specs.get((root_name, endpoint.__module__), None))]):
+            return endpoint, cls
+
+        # The endpoint's module has been reloaded since the route table was built, so the table is built again
+        _recompile_routes(root_name)
+        return _resolve(method, branch, root)
+    else:
+        raise MethodNotAllowed(method)
+
+
+def _recompile_routes(root: str) -> None:
+    """Build the route table of a package again, discarding views of the endpoints whose modules have been reloaded
+
+    :param root: The name of the root package of the structured endpoints
+    :return: None
+    """
+
+    with _routes_lock:
+        stale = [module for (package, module), spec in list(_route_specs.items()) if package == root and not _is_current([(module, spec)])]
+
+        if not len(stale):
+            return
+
+        for key in [key for key in _route_specs if key[0] == root]:
+            del _route_specs[key]
+
+        _routes[root] = _compile_routes(importlib.import_module(root))
+
+        with _views_lock:
+            for key in [key for key in _views if key[0].__module__ in stale]:
+                del _views[key]
+
+
+def _get_branch(request: WSGIRequest, root: Union[str, ModuleType]) -> str:
+    """Translate the request path into a branch within the structured endpoints
+
+    :param request: A request sent from Django REST Framework
+    :param root: The root package of the structured endpoints
+    :return: A branch in Python's import format (e.g. 'root.pkg_a.module_a.func')
+    """
+
+    # Django attaches the matched URL pattern to the request before calling the view, so the path need not be resolved again
+    resolver_match = getattr(request, 'resolver_match', None) or resolve(request.path_info)
+    route = re.sub(r'\.\*$', '', resolver_match.route)
+    return '%s.%s' % (root if isinstance(root, str) else root.__name__, re.sub(r'^/%s' % route, '', request.path).replace('/', '.'))
+
+
 def handle(request: WSGIRequest, root: Union[str, ModuleType]) -> Response:
     """Handle a redirected request from Django REST Framework, call the target endpoint and gets the result, then create a wrapped response
 
@@ -203,6 +418,8 @@ def handle(request: WSGIRequest, root: Union[str, ModuleType]) -> Response:
 
     To get a description of a particular endpoint function, append '?*' to the URI, e.g., 'http://domain/api/parent_pkg/pkg_a/module_a/func?*'
 
+    Unless requested by a web browser, descriptions are served as pre-rendered JSON tagged with an ETag (see 'responses').
+
     :param request: A request sent from Django REST Framework
     :param root: The root package of the structured endpoints
     :return: Django REST Framework's Response object
@@ -210,35 +427,233 @@ def handle(request: WSGIRequest, root: Union[str, ModuleType]) -> Response:
 
     # 'request.GET' is a QueryDict. When appending '?**' to the URI, '**' becomes a dictionary key
     if '**' in request.GET:
-        route = re.sub(r'\.\*$', '', resolve(request.path_info).route)
-        branch = ('%s.%s' % (root if isinstance(root, str) else root.__name__, re.sub(r'^/%s' % route, '', request.path).replace('/', '.'))).strip('.')
-        return _reply(request, 'api', walk_endpoints(branch, 'reduce' in request.GET), status.HTTP_200_OK)
+        branch, reduce = _get_branch(request, root).strip('.'), 'reduce' in request.GET
+        api_tree = walk_endpoints(branch, reduce)
 
-    else:
-        route = re.sub(r'\.\*$', '', resolve(request.path_info).route)
-        branch = '%s.%s' % (root if isinstance(root, str) else root.__name__, re.sub(r'^/%s' % route, '', request.path).replace('/', '.'))
+        if responses.accepts(request):
+            return responses.reply(request, responses.render(('api', branch, reduce), source=api_tree, content=lambda: {'api': api_tree}))
+        else:
+            return _reply(request, 'api', api_tree, status.HTTP_200_OK)
 
+    else:
         # Given the request URI and method, try to find the target endpoint
         try:
-            endpoint, request.META[Glossary.META_CLASS.value] = _get_endpoint(request.method, branch, root if isinstance(root, str) else None)
-            request.META[Glossary.META_ENDPOINT.value] = meta.Endpoint(endpoint)
+            endpoint, request.META[Glossary.META_CLASS.value] = _resolve(request.method, _get_branch(request, root), root)
+            request.META[Glossary.META_ENDPOINT.value] = meta.describe(endpoint)
         except MethodNotAllowed as error:
             return _reply(request, 'detail', error.detail, status.HTTP_403_FORBIDDEN)
-        except AttributeError as error:
+        except (AttributeError, ModuleNotFoundError) as error:
             return _reply(request, 'detail', str(error), status.HTTP_403_FORBIDDEN)
 
         if '*' in request.GET:
-            return _reply(request, 'help', request.META[Glossary.META_ENDPOINT.value].rest(brief='brief' in request.GET), status.HTTP_200_OK)
+            descriptor, brief = request.META[Glossary.META_ENDPOINT.value], 'brief' in request.GET
+
+            if responses.accepts(request):
+                return responses.reply(request, responses.render(('help', descriptor.func.__module__, descriptor.func.__qualname__, brief),
+                                                                 source=descriptor, content=lambda: {'help': descriptor.rest(brief=brief)}))
+            else:
+                return _reply(request, 'help', descriptor.rest(brief=brief), status.HTTP_200_OK)
         else:
-            view = api_view([request.method])(endpoint)
+            return _get_view(endpoint, request.method)(request)
 
-            if hasattr(settings, 'REST_FRAMEWORK'):
-                throttle_rates = settings.REST_FRAMEWORK.get('DEFAULT_THROTTLE_RATES', None)
 
-                if throttle_rates is not None and getattr(endpoint, 'meta')['throttle'] in throttle_rates:
-                    view.view_class.throttle_custom_scope = getattr(endpoint, 'meta')['throttle']
+async def ahandle(request: ASGIRequest, root: Union[str, ModuleType]) -> HttpResponseBase:
+    """Handle a redirected request under ASGI (see 'handle')
+
+    Requests to coroutine endpoint functions (defined with 'async def') are awaited on the event loop,
+    while Django REST Framework's authentication, permission, and throttle checks run on Django's thread-sensitive executor.
+    All other requests, including those to synchronous endpoint functions and those for descriptions, are handled by 'handle' on a thread pool.
+
+    :param request: A request sent from Django
+    :param root: The root package of the structured endpoints
+    :return: Django's response object
+    """
+
+    if '*' not in request.GET and '**' not in request.GET:
+        try:
+            endpoint, cls = _resolve(request.method, _get_branch(request, root), root)
+        except (MethodNotAllowed, AttributeError, ModuleNotFoundError):
+            # Let 'handle' reply with the error
+            endpoint, cls = None, None
+
+        if getattr(endpoint, 'asynchronous', False) and cls is None:
+            request.META[Glossary.META_CLASS.value] = None
+            request.META[Glossary.META_ENDPOINT.value] = meta.describe(endpoint)
+            return await _adispatch(_get_view(endpoint, request.method), endpoint, request)
+
+    return await sync_to_async(_handle_in_thread, thread_sensitive=False)(request, root)
+
+
+def _handle_in_thread(request: ASGIRequest, root: Union[str, ModuleType]) -> HttpResponseBase:
+    close_old_connections()
+
+    try:
+        return handle(request, root)
+    finally:
+        close_old_connections()
+
+
+async def _adispatch(view_func: Callable[..., Any], endpoint: Callable[..., Any], request: ASGIRequest) -> HttpResponseBase:
+    """Follow the steps of Django REST Framework's 'APIView.dispatch', awaiting the endpoint instead of calling a handler
+
+    :param view_func: Django REST Framework's view wrapping the endpoint function (see '_get_view')
+    :param endpoint: The endpoint function
+    :param request: A request sent from Django
+    :return: Django REST Framework's Response object
+    """
+
+    view = view_func.view_class(**view_func.view_initkwargs)
+    view.setup(request)
+    view.request = request = view.initialize_request(request)
+    view.headers = view.default_response_headers
+
+    try:
+        await sync_to_async(view.initial)(request)
+        response = await endpoint.acall(request)
+    except Exception as error:
+        response = view.handle_exception(error)
+
+    view.response = view.finalize_response(request, response)
+    return view.response
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def handle_batch(request: WSGIRequest, root: Union[str, ModuleType], workers: int = None) -> Response:
+    """Handle a batch of endpoint calls sent in one request
+
+    The request body is a JSON array of calls, each of which consists of the path to an endpoint relative to the root package,
+    the HTTP method, and the arguments, e.g.:
+    ---
+        [
+            {"path": "pkg_a/module_a/func", "method": "GET", "args": {"x": 1}},
+            {"path": "pkg_b/pkg_c/module_c", "method": "POST", "args": {"title": "Hello"}}
+        ]
+    ---
+
+    The request is authenticated once, while permissions and throttles of each endpoint are checked for each call,
+    with the call's own HTTP method, as if it were sent on its own.
+    The response contains a list of results in the same order as the calls, each of which carries its own status code, e.g.:
+    ---
+        {"data": [{"status": 200, "data": 3}, {"status": 403, "detail": "..."}]}
+    ---
+
+    :param request: A request sent from Django REST Framework
+    :param root: The root package of the structured endpoints
+    :param workers: The number of threads executing the calls concurrently; if None, the calls are executed sequentially
+    :return: Django REST Framework's Response object
+    """
+
+    calls = request.data
+
+    if not isinstance(calls, list) or not all(isinstance(call, dict) for call in calls):
+        return Response({'detail': 'Expected a JSON array of endpoint calls'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if workers is None or len(calls) < 2:
+        results = [_call(request, root, call) for call in calls]
+    else:
+        results = list(_get_batch_executor(workers).map(partial(_call, request, root, threaded=True), calls))
+
+    return Response({'data': results}, status=status.HTTP_200_OK)
+
+
+def _get_batch_executor(workers: int) -> ThreadPoolExecutor:
+    executor = _batch_executors.get(workers, None)
 
-            return view(request)
+    if executor is None:
+        with _batch_executors_lock:
+            executor = _batch_executors.get(workers, None)
+
+            if executor is None:
+                executor = _batch_executors[workers] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='dorest-batch')
+
+    return executor
+
+
+def _call(request: Request, root: Union[str, ModuleType], call: Dict[str, Any], threaded: bool = False) -> Dict[str, Any]:
+    """Execute an endpoint call within a batch (see 'handle_batch')
+
+    :param request: The batch request sent from Django REST Framework
+    :param root: The root package of the structured endpoints
+    :param call: A dictionary containing 'path', 'method' (default: GET), and 'args' of the call
+    :param threaded: Whether the call is executed by a worker thread, which must release its database connections
+    :return: A dictionary containing the status code and either the result or the error detail
+    """
+
+    method = str(call.get('method', 'GET')).upper()
+    branch = '%s.%s' % (root if isinstance(root, str) else root.__name__, str(call.get('path', '')).strip('/').replace('/', '.'))
+
+    try:
+        endpoint, cls = _resolve(method, branch.strip('.'), root)
+
+        if cls is not None:
+            raise AttributeError("Endpoint '%s' is defined in a class and cannot be called in a batch" % branch)
+    except MethodNotAllowed as error:
+        return {'status': status.HTTP_403_FORBIDDEN, 'detail': error.detail}
+    except (AttributeError, ModuleNotFoundError) as error:
+        return {'status': status.HTTP_403_FORBIDDEN, 'detail': str(error)}
+
+    if threaded:
+        close_old_connections()
+
+    # The batch itself is always posted, so permissions and throttles must see the call's own method
+    request = clone_request(request, method)
+
+    try:
+        # Apply the endpoint's permissions and throttles as Django REST Framework's view would do
+        view = _get_view(endpoint, method).view_class(request=request, args=(), kwargs={}, format_kwarg=None, headers={})
+        view.check_permissions(request)
+        view.check_throttles(request)
+
+        if endpoint.admission is not None:
+            endpoint.admission.acquire()
+
+        try:
+            args = call.get('args', {})
+            parameters = meta.describe(endpoint).parse(**args if isinstance(args, dict) else {})
+
+            if endpoint.meta['include_request'] is not None:
+                parameters[endpoint.meta['include_request']] = request
+
+            result = endpoint.execute(parameters, request)
+
+            if isinstance(result, jobs.Submission):
+                return {'status': status.HTTP_202_ACCEPTED, 'data': result}
+
+            return {'status': status.HTTP_200_OK, 'data': list(result) if responses.is_stream(result) else result}
+        finally:
+            if endpoint.admission is not None:
+                endpoint.admission.release()
+
+    except APIException as error:
+        return {'status': error.status_code, 'detail': error.detail}
+    except TypeError as error:
+        return {'status': status.HTTP_400_BAD_REQUEST, 'detail': str(error)}
+    except Exception as error:
+        # A failing call must not fail the other calls of the batch
+        verbose.error("Batch call to '%s' failed: %s" % (branch, error))
+        return {'status': status.HTTP_500_INTERNAL_SERVER_ERROR, 'detail': 'Internal server error'}
+    finally:
+        if threaded:
+            close_old_connections()
+
+
+@api_view(['GET'])
+def handle_job(request: WSGIRequest, job: str) -> Response:
+    """Serve the status of a background job submitted to an endpoint in job mode (see 'jobs')
+
+    :param request: A request sent from Django REST Framework
+    :param job: The job's ID
+    :return: Django REST Framework's Response object containing the job's status, and its result or error detail once it is finished
+    """
+
+    record = jobs.get(job)
+
+    # Jobs of other users are treated as unknown
+    if record is None or record['user'] != getattr(getattr(request, 'user', None), 'pk', None):
+        raise ObjectNotFound()
+
+    return Response({'data': {key: value for key, value in record.items() if key != 'user'}}, status=status.HTTP_200_OK)
 
 
 def redirect(*, methods: List[str], at: Union[str, ModuleType], to: [str, ModuleType]) -> None:
@@ -263,20 +678,62 @@ def redirect(*, methods: List[str], at: Union[str, ModuleType], to: [str, Module
     [setattr(caller, Glossary.REDIRECT.value, {**getattr(caller, Glossary.REDIRECT.value, {}), **{method.lower(): target}}) for method in methods]
 
 
-def bind(package: Union[str, ModuleType], *, to: Union[str, ModuleType], url: str = r'.*') -> None:
+def bind(package: Union[str, ModuleType], *, to: Union[str, ModuleType], url: str = r'.*', asynchronous: bool = False) -> None:
     """Bind a package of structured endpoints to a manager
 
-    ...
+    All modules within the package are imported and their endpoints are compiled into a route table,
+    which 'handle' consults before resolving endpoints from the request path.
+    If any endpoint executes its calls as background jobs, a route serving their statuses is bound under the same URL (see 'jobs').
 
     :param package: The package of structured endpoints
     :param to: The target module
     :param url: URL path to the target module
+    :param asynchronous: Handle requests with an asynchronous view for deployment under ASGI (see 'ahandle')
     :return: None
     """
 
     pkg, anchor = _get_module(package), _get_module(to)
+    _routes[pkg.__name__] = _compile_routes(pkg)
+
+    if asynchronous:
+        view = partial(ahandle, root=pkg)
+        view.csrf_exempt = True
+    else:
+        view = csrf_exempt(partial(handle, root=pkg))
+
+    patterns = [re_path(url, view)]
+
+    # Statuses of background jobs are served under the same URL prefix, ahead of the endpoints
+    if any(endpoint.meta.get('mode', None) == 'job' for methods in _routes[pkg.__name__].values() for endpoint, cls in methods.values()):
+        prefix = re.sub(r'(\.\*)?\$?$', '', url).lstrip('^')
+        patterns.insert(0, re_path(r'^%s%s/(?P<job>[0-9a-f]{32})/?$' % (prefix, jobs.ROUTE), handle_job, name=jobs.route(pkg.__name__, prefix)))
+
+    setattr(anchor, 'urlpatterns', getattr(anchor, 'urlpatterns', []) + patterns)
+
+
+def bind_batch(package: Union[str, ModuleType], *, to: Union[str, ModuleType], url: str, workers: int = None) -> None:
+    """Bind a route that executes batches of endpoint calls within a package of structured endpoints (see 'handle_batch')
+
+    The route must be bound separately from, and usually next to, the package, e.g.:
+    ---
+        struct.bind_batch('api', to=__name__, url=r'^batch/$', workers=8)
+        struct.bind('api', to=__name__, url=r'api/')
+    ---
+
+    :param package: The package of structured endpoints
+    :param to: The target module
+    :param url: URL path to the batch route
+    :param workers: The number of threads executing the calls of a batch concurrently; if None, the calls are executed sequentially
+    :return: None
+    """
+
+    pkg, anchor = _get_module(package), _get_module(to)
+
+    if pkg.__name__ not in _routes:
+        _routes[pkg.__name__] = _compile_routes(pkg)
+
     setattr(anchor, 'urlpatterns',
-            getattr(anchor, 'urlpatterns', []) + [re_path(url, csrf_exempt(partial(handle, root=pkg)))])
+            getattr(anchor, 'urlpatterns', []) + [re_path(url, csrf_exempt(partial(handle_batch, root=pkg, workers=workers)))])
 
 
 def extend(pattern: str, *, at: Union[str, ModuleType], to: Union[str, ModuleType]) -> None:
@@ -0,0 +1,151 @@
+"""In-process throttles for endpoint scopes
+
+'TokenBucketThrottle' limits the requests to each throttle scope declared in the 'endpoint' decorator, separately for each user
+(or each client address for anonymous users), without a round trip to Django's cache backend.
+Enable it in Django's settings, with rates written as in Django REST Framework (e.g. '100/min'):
+---
+    DOREST = {'DEFAULT_THROTTLE_CLASSES': ['dorest.throttles.TokenBucketThrottle'],
+              'THROTTLE_RATES': {'base': '100/min', 'search': '10/s'}}
+---
+Rates are also read from 'REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"]'; those in 'DOREST["THROTTLE_RATES"]' take precedence.
+A rate of 'n/period' allows bursts of up to n requests, refilled at n per period.
+Heavy endpoints may consume more than one token per request, e.g.:
+---
+    @endpoint(['GET'], throttle='search', throttle_cost=5)
+    def full_text_search(query: str) -> list:
+        ...
+---
+A cost larger than the burst of the scope's rate is capped at the burst, so that such requests can still be admitted once the bucket is full.
+
+Each bucket is a single number, the time at which it will be full again ('generic cell rate algorithm'),
+so that a check is one lookup and one assignment, without locks.
+Concurrent checks of the same bucket may therefore occasionally admit a request more than the rate allows.
+Buckets are kept per worker process, or, if counters are enabled (see 'counters'), shared by all workers of the node.
+Shared buckets are kept in wall-clock time, since the table's file may outlive a reboot, which restarts the monotonic clock.
+They expire once full, freeing their slots for other clients.
+
+The Dorest project
+:copyright: (c) 2020 Ichise Laboratory at NII & AIST
+:author: Rungsiman Nararatwong
+"""
+
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from django.conf import settings
+
+from rest_framework.request import Request
+from rest_framework.throttling import BaseThrottle
+
+from dorest import counters
+
+MAX_BUCKETS = 65536
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+_buckets = dict()       # A dictionary of {([scope], [identity]): [time at which the bucket is full]}
+_rates = dict()         # A dictionary of {[rate]: ([number of requests], [period in seconds])}
+
+
+def get_rates() -> Dict[str, str]:
+    """Retrieve throttle rates of all scopes from Django's settings
+
+    :return: A dictionary of {[scope]: [rate]}
+    """
+
+    rates = dict()
+
+    if hasattr(settings, 'REST_FRAMEWORK'):
+        rates.update(settings.REST_FRAMEWORK.get('DEFAULT_THROTTLE_RATES', None) or {})
+
+    if hasattr(settings, 'DOREST'):
+        rates.update(settings.DOREST.get('THROTTLE_RATES', None) or {})
+
+    return rates
+
+
+def parse_rate(rate: str) -> Tuple[int, float]:
+    """Parse a rate written as in Django REST Framework, e.g., '100/min' or '5/s'
+
+    :param rate: The rate
+    :return: A tuple of (number of requests, period in seconds)
+    """
+
+    parsed = _rates.get(rate, None)
+
+    if parsed is None:
+        num, period = rate.split('/')
+        parsed = _rates[rate] = (int(num), PERIODS[period.strip()[0]])
+
+    return parsed
+
+
+def consume(scope: str, identity: Any, rate: str, cost: float = 1) -> float:
+    """Take tokens from a bucket
+
+    :param scope: The throttle scope
+    :param identity: The identity of the client
+    :param rate: The rate of the scope
+    :param cost: The number of tokens to take, at most the number of requests of the rate
+    :return: Zero if the tokens were taken, or the number of seconds to wait until they are available
+    """
+
+    num, period = parse_rate(rate)
+    cost = min(cost, num)
+    table = counters.get_table()
+
+    now = time.time() if table is not None else time.monotonic()
+
+    def take(full_at: float) -> Optional[float]:
+        # A bucket is never full later than one period from now, unless the clock was set back
+        full_at = min(max(full_at, now), now + period) + cost * period / num
+
+        # A bucket that would be full later than one period from now does not have enough tokens
+        return full_at if full_at - now <= period else None
+
+    # A full table leaves the bucket to the worker process, rather than taking the slot of another client's bucket
+    updated = table.update('throttle:%s:%s' % (scope, identity), take, expired_before=now) if table is not None else None
+
+    if updated is not None:
+        full_at, taken = updated
+    else:
+        full_at = _buckets.get((scope, identity), now)
+        taken = take(full_at)
+
+        if taken is not None:
+            _buckets[(scope, identity)] = taken
+
+            if len(_buckets) > MAX_BUCKETS:
+                _prune(now)
+
+    return 0 if taken is not None else min(max(full_at, now), now + period) + cost * period / num - now - period
+
+
+def _prune(now: float) -> None:
+    """Drop buckets that are full, which are equivalent to missing buckets"""
+
+    for key in [key for key, full_at in list(_buckets.items()) if full_at <= now]:
+        _buckets.pop(key, None)
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Throttle requests to an endpoint's scope using in-process token buckets"""
+
+    def __init__(self):
+        self.delay = 0
+
+    def allow_request(self, request: Request, view: Any) -> bool:
+        scope = getattr(view, 'throttle_custom_scope', None)
+        rate = get_rates().get(scope, None) if scope is not None else None
+
+        if rate is None:
+            return True
+
+        self.delay = consume(scope, self.get_identity(request), rate, getattr(view, 'throttle_cost', 1))
+        return self.delay == 0
+
+    def get_identity(self, request: Request) -> Any:
+        user = getattr(request, 'user', None)
+        return user.pk if user is not None and getattr(user, 'is_authenticated', False) else self.get_ident(request)
+
+    def wait(self) -> float:
+        return self.delay